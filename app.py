@@ -1,180 +1,494 @@
+import asyncio
+import hashlib
 import http.server
+import io
+import json
+import select
+import signal
 import socketserver
+import threading
+import time
 import urllib.parse
-import random, sqlite3
+import secrets
 import string
-from security import hash_password
-from database import create_tables      
+from concurrent.futures import ThreadPoolExecutor
+from security import hash_password, start_pool, shutdown_pool
+from database import create_tables, table_versions
+from db_pool import describe_pragmas, close_connection
+from sessions import SessionStore, SqliteSessionStore
+from prefork import PreforkSupervisor
+from tokens import SignedSessions, parse_keys
+from cache import cache_stats
+from ratelimit import KeyedRateLimiter, ConcurrencyLimiter
+from router import Router
+from stats import get_stat, top_stats
+from batch import apply_batch, BatchError
+import compression
+import config
+import pages
+from templates import Fragment, Markup
+from queries import projection
 from user_crud import (
     create_user, 
     login, get_user_by_id, list_users_paginated,
-    update_user, delete_user
+    update_user, delete_user, USER_FIELDS
     )
 from music_crud import (
     list_songs_for_user,list_songs_paginated, 
-    create_song, update_song, get_song_by_id,delete_song
+    create_song, update_song, get_song_by_id,delete_song,
+    search_songs, iter_songs_export, import_songs, SONG_IMPORT_FORMATS,
+    SONG_FIELDS, SONG_LIST_FIELDS
     )
 from artist_crud import (
     create_artist, update_artist, delete_artist,
     get_artist_by_id,list_artists_paginated,
-    list_songs_for_artist,export_artists_csv,
-    import_artists_csv
+    list_songs_for_artist,iter_artists_csv,
+    import_artists_csv, search_artists, ARTIST_FIELDS, ARTIST_SONG_FIELDS
     )
 
-# In-memory session store: { session_id: user_id }
-SESSIONS = {}
+# Upper bound for the `limit` query parameter on list pages.
+MAX_PAGE_SIZE = 100
+# Page size for /api list endpoints when no `limit` is given.
+API_DEFAULT_PAGE_SIZE = 50
+# Results per page on /search when no `limit` is given.
+SEARCH_PAGE_SIZE = 20
+# How many rejected rows the import result page lists.
+MAX_IMPORT_ERRORS_SHOWN = 100
+
+def make_session_store(backend):
+    """
+    "memory": per-process SessionStore (single process servers).
+    "sqlite": SqliteSessionStore, shared by all pre-forked worker processes.
+    """
+    store_class = SqliteSessionStore if backend == "sqlite" else SessionStore
+    return store_class(
+        idle_ttl=config.SESSION_IDLE_TTL,
+        absolute_ttl=config.SESSION_ABSOLUTE_TTL,
+        max_sessions=config.SESSION_MAX,
+    )
+
+# Session store: session_id -> SessionRecord(user_id, role)
+SESSIONS = make_session_store(config.SESSION_BACKEND)
+# Stateless alternative, used when config.SESSION_MODE == "signed".
+SESSION_TOKENS = SignedSessions(parse_keys(config.SESSION_KEYS), ttl=config.SESSION_TOKEN_TTL)
+
+# Login admission control: PBKDF2 costs ~100k HMAC rounds per attempt, so
+# attempts are rate limited per client and per email, and only a fixed
+# number of password verifications may run at once.
+LOGIN_CLIENT_LIMITER = KeyedRateLimiter(config.LOGIN_RATE_PER_CLIENT, config.LOGIN_BURST_PER_CLIENT)
+LOGIN_EMAIL_LIMITER = KeyedRateLimiter(config.LOGIN_RATE_PER_EMAIL, config.LOGIN_BURST_PER_EMAIL)
+LOGIN_INFLIGHT = ConcurrencyLimiter(config.LOGIN_MAX_INFLIGHT)
 
 def generate_session_id(length=32):
-    return ''.join(random.choices(string.ascii_letters + string.digits, k=length))
+    # secrets, not random: session ids must not be predictable.
+    return ''.join(secrets.choice(string.ascii_letters + string.digits) for _ in range(length))
+
+# Role sets declared on routes.
+ADMIN_ONLY = ('super_admin',)
+ADMIN_OR_MANAGER = ('super_admin', 'artist_manager')
+
+ROUTES = Router()
+
+# Marks the per-request session as not looked up yet (None means no session).
+_UNRESOLVED = object()
 
 class MyHandler(http.server.BaseHTTPRequestHandler):
 
+    # Persistent connections: every response carries Content-Length (or is
+    # chunked), an idle connection is closed after `timeout` seconds and a
+    # connection is closed after `max_requests` requests. Servers that set
+    # keep_alive = False get one request per connection.
+    protocol_version = "HTTP/1.1"
+    timeout = config.KEEPALIVE_TIMEOUT
+    max_requests = config.KEEPALIVE_MAX_REQUESTS
+    idle_poll_interval = 0.1
+    requests_handled = 0
+
+    def handle(self):
+        self.handle_one_request()
+        while not self.close_connection and self.wait_for_request():
+            self.handle_one_request()
+
+    def wait_for_request(self):
+        """
+        Wait up to `timeout` seconds for the next request on an idle
+        connection. Returns False, so the connection is closed, on timeout or
+        as soon as the server has a new connection waiting for a worker.
+        """
+        deadline = time.monotonic() + self.timeout
+        while True:
+            # A pipelined request may already be buffered in rfile, where
+            # select() cannot see it; peek without blocking first.
+            self.connection.setblocking(False)
+            try:
+                if self.rfile.peek(1):
+                    return True
+            finally:
+                self.connection.settimeout(self.timeout)
+            if self.server_has_waiting_connection():
+                return False
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            readable, _, _ = select.select([self.connection], [], [], min(remaining, self.idle_poll_interval))
+            if readable:
+                return True
+
+    def server_has_waiting_connection(self):
+        waiting = getattr(self.server, 'has_waiting_connection', None)
+        return waiting is not None and waiting()
+
+    def handle_one_request(self):
+        self.requests_handled += 1
+        self.etag = None
+        self.session = _UNRESOLVED
+        super().handle_one_request()
+
+    def end_headers(self):
+        if not self.close_connection and (
+                self.requests_handled >= self.max_requests or not getattr(self.server, 'keep_alive', True)):
+            # send_header() also sets close_connection.
+            self.send_header('Connection', 'close')
+        super().end_headers()
+
     def do_GET(self):
         # Parse the path
         parsed_path = urllib.parse.urlparse(self.path)   #Parses the self.path (the requested URL).
-        path = parsed_path.path
         query = urllib.parse.parse_qs(parsed_path.query)  #Converts the query string into a Python dictionary.
-
-        if path == '/':
-            self.handle_home_page()
-        elif path == '/register_user':
-            self.handle_user_register_form()
-        elif path == '/users':
-            self.handle_list_users(query)
-        elif path == '/update_user':
-            self.handle_user_update_form()
-        elif path == '/delete_user':
-            self.handle_user_delete_form()
-        elif path == '/artists':
-            self.handle_list_artists(query)
-        elif path == '/artist_songs':
-            self.handle_artist_songs(query)
-        elif path == '/register_artist':
-            self.handle_artist_register_form()
-        elif path == '/update_artist':
-            self.handle_artist_update_form()
-        elif path == '/delete_artist':
-            self.handle_artist_delete_form()
-        elif path == '/artist_export':
-            self.handle_artist_export()
-        elif path == '/artist_import_form':
-            self.handle_artist_import_form()
-        elif path == '/songs':
-            self.handle_list_songs(query)
-        elif path == '/register_song':
-            self.handle_song_register_form()
-        elif path == '/update_song':
-            self.handle_song_update_form()
-        elif path == '/delete_song':
-            self.handle_song_delete_form()
-        elif path == '/dashboard':
-            self.handle_dashboard()
-        elif path == '/login':
-            self.handle_login_form()
-        elif path == '/logout':
-            self.handle_logout()
-        else:
-            self.send_error(404, "Not Found")
-        
-        # elif path == '/list_user':
-        #     self.handle_user_list_form()
-        # elif path == '/list_song':
-        #     self.handle_song_list_form()
-       
-        
+        self.dispatch('GET', parsed_path.path, query)
 
     def do_POST(self):
         # We'll parse form data from the body
         parsed_path = urllib.parse.urlparse(self.path)
-        path = parsed_path.path
         content_length = int(self.headers.get('Content-Length', 0))
         body = self.rfile.read(content_length)
-        form_data = urllib.parse.parse_qs(body.decode())
-        
-        if path == '/register_user':
-            self.handle_register_submit(form_data)
-        elif path == '/update_user':
-            self.handle_update_user_submit(form_data)
-        elif path == '/delete_user':
-            self.handle_delete_user_submit(form_data)
-        elif path == '/register_artist':
-            self.handle_artist_register_submit(form_data)
-        elif path == '/update_artist':
-            self.handle_artist_update_submit(form_data)
-        elif path == '/delete_artist':
-            self.handle_delete_artist_submit(form_data)
-        elif path == '/artist_import_form':
-            self.handle_artist_import(form_data)
-        elif path == '/register_song':
-            self.handle_song_register_submit(form_data)
-        elif path == '/update_song':
-            self.handle_song_update_submit(form_data)
-        elif path == '/delete_song':
-            self.handle_song_delete_submit(form_data)
-        elif path == '/login':
-            self.handle_login_submit(form_data)
+        content_type = self.headers.get_content_type()
+        if parsed_path.path.startswith('/api/'):
+            # JSON API requests: the handler gets the decoded document.
+            if content_type != 'application/json':
+                self.send_json_response({'error': 'Request body must be application/json'}, 415)
+                return
+            try:
+                form_data = json.loads(body)
+            except ValueError:
+                self.send_json_response({'error': 'Request body is not valid JSON'}, 400)
+                return
         else:
+            # Form routes only take url-encoded bodies.
+            if 'Content-Type' in self.headers and content_type != 'application/x-www-form-urlencoded':
+                self.send_error(415, "Unsupported Media Type")
+                return
+            try:
+                form_data = urllib.parse.parse_qs(body.decode())
+            except UnicodeDecodeError:
+                self.send_error(400, "Bad Request")
+                return
+        self.dispatch('POST', parsed_path.path, form_data)
+
+    def dispatch(self, method, path, params):
+        """
+        Look up the route and check its declared roles against the session
+        (resolved once for the request) before calling the handler.
+        """
+        route = ROUTES.resolve(method, path)
+        if route is None:
             self.send_error(404, "Not Found")
+            return
+        if route.roles is not None and self.get_current_user_role() not in route.roles:
+            if path.startswith('/api/'):
+                self.send_json_response({'error': 'Access denied'}, 403)
+            else:
+                self.send_html_response("<h1>Access Denied</h1>", 403)
+            return
+        route.handler(self, params)
 
     # ------------------------
     # Helpers
     # ------------------------
 
-    def get_current_user_id(self):
-        """
-        Check the cookie for a session_id, look it up in SESSIONS.
-        Return the user_id if logged in, otherwise None.
-        """
+    def get_session_id(self):
+        """Return the session_id from the Cookie header, or None."""
         cookie_header = self.headers.get('Cookie')
         if not cookie_header:
             return None
 
         # Cookie might look like: session_id=ABC123
-        cookies = {}
         for kv in cookie_header.split(';'):
             kv = kv.strip()
             if '=' in kv:
                 key, value = kv.split('=', 1)
-                cookies[key] = value
-
-        session_id = cookies.get('session_id')
-        if session_id and session_id in SESSIONS:
-            return SESSIONS[session_id]
+                if key == 'session_id':
+                    return value
         return None
-    
-    
 
-    def get_current_user_role(self):
-        user_id = self.get_current_user_id()
-        if not user_id:
+    def get_current_session(self):
+        """Return the SessionRecord for the request's cookie, or None."""
+        if self.session is _UNRESOLVED:
+            self.session = self.load_session()
+        return self.session
+
+    def load_session(self):
+        session_id = self.get_session_id()
+        if not session_id:
             return None
-        row = get_user_by_id(user_id)
-        if row:
-            # row = (id, first_name, last_name, email, role)
-            return row[4]
-        return None
+        if config.SESSION_MODE == "signed":
+            # Verified from the cookie alone, no server-side lookup.
+            return SESSION_TOKENS.verify(session_id)
+        return SESSIONS.get(session_id)
+
+    def get_current_user_id(self):
+        """
+        Check the cookie for a session_id, look it up in SESSIONS.
+        Return the user_id if logged in, otherwise None.
+        """
+        session = self.get_current_session()
+        return session.user_id if session else None
+
+    def get_current_user_role(self):
+        # The role is cached on the session at login, so no DB round trip.
+        session = self.get_current_session()
+        return session.role if session else None
     
-    def send_html_response(self, html, status=200):
-        """Utility to send HTML with UTF-8 encoding."""
+    def get_content_encoding(self):
+        """The compression to use for this response, from Accept-Encoding."""
+        return compression.negotiate(self.headers.get('Accept-Encoding'))
+
+    def check_not_modified(self, *tables):
+        """
+        Conditional GET for a page built from `tables`. The ETag is derived
+        from the URL and the tables' change versions, so computing it never
+        reads the tables themselves. Sends 304 and returns True when the
+        client's If-None-Match already matches; otherwise remembers the ETag
+        for the response and returns False.
+        """
+        versions = table_versions(tables)
+        digest = hashlib.sha1(f"{self.path}|{sorted(versions.items())}".encode()).hexdigest()[:20]
+        etag = f'W/"{digest}"'
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match:
+            candidates = [tag.strip() for tag in if_none_match.split(',')]
+            if etag in candidates or '*' in candidates:
+                self.send_response(304)
+                self.send_cache_headers(etag)
+                self.end_headers()
+                return True
+        self.etag = etag
+        return False
+
+    def send_cache_headers(self, etag):
+        self.send_header('ETag', etag)
+        # Per-user pages: browsers may keep them but must revalidate.
+        self.send_header('Cache-Control', 'private, no-cache')
+        self.send_header('Vary', 'Accept-Encoding, Cookie')
+
+    def send_html_response(self, html, status=200, headers=()):
+        """Utility to send HTML with UTF-8 encoding, compressed if the client accepts it."""
+        self.send_encoded('text/html; charset=utf-8', html.encode('utf-8'), status, headers)
+
+    def send_json_response(self, obj, status=200, headers=()):
+        """Send `obj` as compact JSON, compressed if the client accepts it."""
+        body = json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+        self.send_encoded('application/json', body, status, headers)
+
+    def send_encoded(self, content_type, body, status=200, headers=()):
+        encoding = None
+        if len(body) >= config.COMPRESSION_MIN_SIZE:
+            encoding = self.get_content_encoding()
+        if encoding:
+            body = compression.compress(body, encoding, config.COMPRESSION_LEVEL)
+        self.send_body(content_type, body, encoding, status, headers)
+
+    def send_static_page(self, page, status=200, headers=()):
+        """Send a templates.StaticPage; its encoded and compressed bodies are built once."""
+        encoding = None
+        if len(page.body) >= config.COMPRESSION_MIN_SIZE:
+            encoding = self.get_content_encoding()
+        self.send_body('text/html; charset=utf-8', page.encoded(encoding), encoding, status, headers)
+
+    def send_body(self, content_type, body, encoding, status=200, headers=()):
+        """Send an already encoded (and, per `encoding`, compressed) body."""
         self.send_response(status)
-        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if self.etag and status == 200:
+            self.send_cache_headers(self.etag)
+        else:
+            self.send_header('Vary', 'Accept-Encoding')
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        for name, value in headers:
+            self.send_header(name, value)
         self.end_headers()
-        self.wfile.write(html.encode('utf-8'))
+        self.wfile.write(body)
 
-    def redirect(self, location):
+    def send_stream_response(self, content_type, chunks, headers=(), status=200):
+        """
+        Send an iterable of str chunks without building the whole body first.
+        Uses chunked transfer encoding when the connection speaks HTTP/1.1;
+        under HTTP/1.0 the body is delimited by closing the connection.
+        Chunks are compressed on the fly when the client accepts it.
+        """
+        chunked = self.protocol_version >= "HTTP/1.1" and self.request_version >= "HTTP/1.1"
+        encoding = self.get_content_encoding()
+        compressor = compression.compressobj(encoding, config.COMPRESSION_LEVEL) if encoding else None
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        if self.etag and status == 200:
+            self.send_cache_headers(self.etag)
+        else:
+            self.send_header('Vary', 'Accept-Encoding')
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        for name, value in headers:
+            self.send_header(name, value)
+        if chunked:
+            self.send_header('Transfer-Encoding', 'chunked')
+        else:
+            self.close_connection = True
+        self.end_headers()
+        def write(data):
+            if not data:
+                return
+            if chunked:
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+            else:
+                self.wfile.write(data)
+
+        try:
+            for chunk in chunks:
+                data = chunk.encode('utf-8')
+                write(compressor.compress(data) if compressor else data)
+            if compressor:
+                write(compressor.flush())
+            if chunked:
+                self.wfile.write(b"0\r\n\r\n")
+        finally:
+            if hasattr(chunks, 'close'):
+                chunks.close()
+
+    def redirect(self, location, headers=()):
         self.send_response(302)
         self.send_header('Location', location)
+        self.send_header('Content-Length', '0')
+        for name, value in headers:
+            self.send_header(name, value)
         self.end_headers()
 
     def check_role(self, allowed_roles):
         """Return True if current user role is in allowed_roles, else False."""
         role = self.get_current_user_role()
         return role in allowed_roles
+
+    def get_client_ip(self):
+        """The client's address, from X-Forwarded-For when configured to trust it."""
+        if config.TRUST_FORWARDED_FOR:
+            forwarded = self.headers.get('X-Forwarded-For')
+            if forwarded:
+                return forwarded.split(',')[0].strip()
+        return self.client_address[0]
+
+    def send_too_many_requests(self, retry_after):
+        self.send_static_page(pages.TOO_MANY_LOGINS, 429, headers=[('Retry-After', str(retry_after))])
+
+    def get_page_params(self, query, default_limit=5):
+        """
+        Read the `after`/`before` id cursors and `limit` from the query string.
+        Returns (after, before, limit), or None if a value is not an integer.
+        """
+        try:
+            after = query.get('after', [None])[0]
+            before = query.get('before', [None])[0]
+            after = int(after) if after else None
+            before = int(before) if before else None
+            limit = int(query.get('limit', [default_limit])[0])
+        except ValueError:
+            return None
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        return after, before, limit
+
+    def page_cursors(self, rows, after, before, limit):
+        """
+        The cursors for the pages around a page of rows whose first column is
+        the id: (`before` for the previous page, `after` for the next page),
+        either None when there is no such page.
+        """
+        prev_before = next_after = None
+        if rows:
+            first_id, last_id = rows[0][0], rows[-1][0]
+            # Going backwards, a short page means we reached the start.
+            if after is not None or (before is not None and len(rows) == limit):
+                prev_before = first_id
+            # Going forwards, a full page means there may be more rows.
+            if before is not None or len(rows) == limit:
+                next_after = last_id
+        elif after is not None:
+            prev_before = after + 1
+        return prev_before, next_after
+
+    def page_links(self, path, rows, after, before, limit):
+        """Render Previous/Next links for a page of rows whose first column is the id."""
+        prev_before, next_after = self.page_cursors(rows, after, before, limit)
+        links = []
+        if prev_before is not None:
+            links.append(('before', prev_before, 'Previous'))
+        if next_after is not None:
+            links.append(('after', next_after, 'Next'))
+        html = Fragment()
+        for i, (cursor, row_id, label) in enumerate(links):
+            if i:
+                html.append(pages.LINK_SEPARATOR)
+            pages.PAGE_LINK.render_into(html, path=path, cursor=cursor, id=row_id, limit=limit, label=label)
+        return pages.PAGE_LINKS.render_into(Fragment(), links=html)
+
+    def render_catalog_stats(self, by_user=False, top=10):
+        """
+        Render the catalog counters: totals, the biggest genres and artists
+        and, with by_user, the user accounts owning the most artists. Every
+        number comes from catalog_stat; names come from the entity caches.
+        """
+        def name_of(get_by_id, name_of_row):
+            def label(key):
+                row = get_by_id(key)
+                return f"{name_of_row(row)} (#{key})" if row else f"#{key}"
+            return label
+
+        tables = [
+            ("Top genres", "Genre", "Songs", top_stats("songs_by_genre", top), str),
+            ("Top artists", "Artist", "Songs", top_stats("songs_by_artist", top),
+             name_of(get_artist_by_id, lambda row: row[2])),
+        ]
+        if by_user:
+            tables.append(("Artists per user", "User", "Artists", top_stats("artists_by_user", top),
+                           name_of(get_user_by_id, lambda row: f"{row[1]} {row[2]}")))
+        html = Fragment()
+        for title, key_label, count_label, rows, label in tables:
+            pages.STAT_TABLE.render_into(
+                html, title=title, key_label=key_label, count_label=count_label,
+                rows=pages.STAT_ROW.render_rows((label(key), count) for key, count in rows),
+            )
+        return pages.CATALOG_STATS.render_into(
+            Fragment(), artists=get_stat("artists"), songs=get_stat("songs"), tables=html)
+
+    def render_import_result(self, result, import_form):
+        """Render the summary returned by a CSV import, listing the first rejected lines."""
+        rejected = result["rejected"]
+        errors = Fragment()
+        if rejected:
+            more = Fragment()
+            if len(rejected) > MAX_IMPORT_ERRORS_SHOWN:
+                pages.IMPORT_ERRORS_MORE.render_into(more, count=len(rejected) - MAX_IMPORT_ERRORS_SHOWN)
+            pages.IMPORT_ERRORS.render_into(
+                errors, rows=pages.IMPORT_ERROR_ROW.render_rows(rejected[:MAX_IMPORT_ERRORS_SHOWN]), more=more)
+        return pages.IMPORT_RESULT.render(
+            inserted=result['inserted'], rejected=len(rejected), elapsed=result['elapsed'],
+            errors=errors, import_form=import_form,
+        )
     # ------------------------
     # Route Handlers (GET)
     # ------------------------
 
-    def handle_home_page(self):
+    @ROUTES.route('GET', '/')
+    def handle_home_page(self, query):
         user_id = self.get_current_user_id()
         role = self.get_current_user_role()
         
@@ -184,499 +498,415 @@ class MyHandler(http.server.BaseHTTPRequestHandler):
             return
         
         # Otherwise show login link
-        html = """
-        <html>
-        <head><title>Home</title></head>
-        <body>
-            <h1>Welcome! Please <a href="/login">Login</a></h1>
-        </body>
-        </html>
-        """
-        self.send_html_response(html)
+        self.send_static_page(pages.HOME_PAGE)
 
-    def handle_user_register_form(self):
+    @ROUTES.route('GET', '/register_user')
+    def handle_user_register_form(self, query):
         """Show a simple HTML form for user registration."""
         
         if self.get_current_user_id():
             self.redirect('/dashboard')
+            return
             
-        html = """
-        <html>
-        <head><title>Register User</title></head>
-        <body>
-            <h1>Register</h1>
-            <form method="POST" action="/register_user">
-                <p>First Name: <input type="text" name="first_name"></p>
-                <p>Last Name: <input type="text" name="last_name"></p>
-                <p>Email: <input type="email" name="email"></p>
-                <p>Password: <input type="password" name="password"></p>
-                <p>Phone: <input type="phone" name="phone"></p>
-                <p>DOB: <input type="dob" name="dob"></p>
-                <p>Gender: 
-                    <select name="gender">
-                        <option value="" disabled selected>Select a gender</option> 
-                        <option value="m">m</option>
-                        <option value="f">f</option>
-                        <option value="o">o</option>
-                    </select>
-                </p>
-                <p>Address: <input type="address" name="address"></p>
-                <p>Role: 
-                    <select name="role">
-                        <option value="" disabled selected>Select a role</option> 
-                        <option value="artist">artist</option>
-                        <option value="artist_manager">artist_manager</option>
-                        <option value="super_admin">super_admin</option>
-                    </select>
-                </p>
-                <input type="submit" value="Register">
-            </form>
-            <p><a href="/login">Back to Login</a></p>
-            <p><a href="/">Back to Home</a></p>
-        </body>
-        </html>
-        """
-        self.send_html_response(html)
+        self.send_static_page(pages.USER_REGISTER_FORM)
 
-    def handle_user_update_form(self):
+    @ROUTES.route('GET', '/update_user')
+    def handle_user_update_form(self, query):
             """Show a simple HTML form for user update."""
-            
-            html = """
-            <html>
-            <head><title>Update User</title></head>
-            <body>
-                <h1>Update User</h1>
-                <form method="POST" action="/update_user">
-                    <p>User ID: <input type="number" name="id"></p>
-                    <p>First Name: <input type="text" name="first_name"></p>
-                    <p>Last Name: <input type="text" name="last_name"></p>
-                    <p>Email: <input type="email" name="email"></p>
-                    <p>Password: <input type="password" name="password"></p>
-                    <p>Phone: <input type="phone" name="phone"></p>
-                    <p>DOB: <input type="dob" name="dob"></p>
-                    <p>Gender: 
-                    <select name="gender">
-                        <option value="" disabled selected>Select a gender</option> 
-                        <option value="m">m</option>
-                        <option value="f">f</option>
-                        <option value="o">o</option>
-                    </select>
-                    </p>
-                    <p>Address: <input type="address" name="address"></p>
-                    <p>Role: 
-                        <select name="role">
-                            <option value="" disabled selected>Select a role</option> 
-                            <option value="artist">artist</option>
-                            <option value="artist_manager">artist_manager</option>
-                            <option value="super_admin">super_admin</option>
-                        </select>
-                    </p>
-                    <input type="submit" value="Update">
-                </form>
-                <p><a href="/">Back to Home</a></p>
-            </body>
-            </html>
-            """
-            self.send_html_response(html)
-
-    def handle_user_delete_form(self):
+            self.send_static_page(pages.USER_UPDATE_FORM)
+
+    @ROUTES.route('GET', '/delete_user')
+    def handle_user_delete_form(self, query):
             """Show a simple HTML form for deleting user."""
-            
-            html = """
-            <html>
-            <head><title>Delete User</title></head>
-            <body>
-                <h1>Delete</h1>
-                <form method="POST" action="/delete_user">
-                    <p>User ID: <input type="number" name="user_id"></p>
-                    <input type="submit" value="Delete">
-                </form>
-                <p><a href="/">Back to Home</a></p>
-            </body>
-            </html>
-            """
-            self.send_html_response(html)
-
-    def handle_artist_register_form(self):
-        """Show a simple HTML form for artist registration."""
+            self.send_static_page(pages.USER_DELETE_FORM)
 
-        html = """
-        <html>
-        <head><title>Register Artist</title></head>
-        <body>
-            <h1>Register</h1>
-            <form method="POST" action="/register_artist">
-                <p>User ID: <input type="integer" name="user_id"></p>
-                <p>Name: <input type="text" name="name"></p>
-                <p>DOB: <input type="text" name="dob"></p>
-                <p>Gender: 
-                    <select name="gender">
-                        <option value="" disabled selected>Select a gender</option> 
-                        <option value="m">m</option>
-                        <option value="f">f</option>
-                        <option value="o">o</option>
-                    </select>
-                </p>
-                <p>Address: <input type="text" name="address"></p>
-                <p>First_release_year: <input type="text" name="first_release_year"></p>
-                <p>No_of_albums_released: <input type="text" name="no_of_albums_released"></p>
-                <input type="submit" value="Register">
-            </form>
-            <p><a href="/">Back to Home</a></p>
-        </body>
-        </html>
-        """
-        self.send_html_response(html)
+    @ROUTES.route('GET', '/register_artist')
+    def handle_artist_register_form(self, query):
+        """Show a simple HTML form for artist registration."""
+        self.send_static_page(pages.ARTIST_REGISTER_FORM)
 
-    def handle_artist_update_form(self):
+    @ROUTES.route('GET', '/update_artist')
+    def handle_artist_update_form(self, query):
             """Show a simple HTML form for artist update."""
-            
-            html = """
-            <html>
-            <head><title>Update Artist</title></head>
-            <body>
-                <h1>Update Artist</h1>
-                <form method="POST" action="/update_artist">
-                    <p>Artist ID: <input type="number" name="id"></p>
-                    <p>Name: <input type="text" name="name"></p>
-                    <p>DOB: <input type="text" name="dob"></p>
-                    <p>Gender: 
-                    <select name="gender">
-                        <option value="" disabled selected>Select a gender</option> 
-                        <option value="m">m</option>
-                        <option value="f">f</option>
-                        <option value="o">o</option>
-                    </select>
-                    </p>
-                    <p>Address: <input type="text" name="address"></p>
-                    <p>First_release_year: <input type="text" name="first_release_year"></p>
-                    <p>No_of_albums_released: <input type="number" name="no_of_albums_released"></p>
-                    <input type="submit" value="Update">
-                </form>
-                <p><a href="/">Back to Home</a></p>
-            </body>
-            </html>
-            """
-            self.send_html_response(html)
-
-    def handle_artist_delete_form(self):
+            self.send_static_page(pages.ARTIST_UPDATE_FORM)
+
+    @ROUTES.route('GET', '/delete_artist')
+    def handle_artist_delete_form(self, query):
             """Show a simple HTML form for artist delete."""
-            
-            html = """
-            <html>
-            <head><title>Delete Artist</title></head>
-            <body>
-                <h1>Delete</h1>
-                <form method="POST" action="/delete_artist">
-                    <p>Artist ID: <input type="number" name="artist_id"></p>
-                    <input type="submit" value="Delete">
-                </form>
-                <p><a href="/">Back to Home</a></p>
-            </body>
-            </html>
-            """
-            self.send_html_response(html)
-
-    def handle_song_register_form(self):
-        """Show a simple HTML form for song registration."""
+            self.send_static_page(pages.ARTIST_DELETE_FORM)
 
-        html = """
-        <html>
-        <head><title>Register Song</title></head>
-        <body>
-            <h1>Register</h1>
-            <form method="POST" action="/register_song">
-                <p>Artist ID: <input type="integer" name="artist_id"></p>
-                <p>Title: <input type="text" name="title"></p>
-                <p>Album Name: <input type="text" name="album_name"></p>
-                <p>Genre: <input type="text" name="genre"></p>
-                <input type="submit" value="Register">
-            </form>
-            <p><a href="/">Back to Home</a></p>
-        </body>
-        </html>
-        """
-        self.send_html_response(html)
+    @ROUTES.route('GET', '/register_song')
+    def handle_song_register_form(self, query):
+        """Show a simple HTML form for song registration."""
+        self.send_static_page(pages.SONG_REGISTER_FORM)
 
-    def handle_song_update_form(self):
+    @ROUTES.route('GET', '/update_song')
+    def handle_song_update_form(self, query):
             """Show a simple HTML form for song update."""
-            html = """
-            <html>
-            <head><title>Update Song</title></head>
-            <body>
-                <h1>Update Song</h1>
-                <form method="POST" action="/update_song">
-                    <p>Song ID: <input type="number" name="id"></p>
-                    <p>Title: <input type="text" name="title"></p>
-                    <p>Album Name: <input type="text" name="album_name"></p>
-                    <p>Genre: <input type="text" name="genre"></p>
-                    <input type="submit" value="Update">
-                </form>
-                <p><a href="/">Back to Home</a></p>
-            </body>
-            </html>
-            """
-            self.send_html_response(html)
-
-    def handle_song_delete_form(self):
+            self.send_static_page(pages.SONG_UPDATE_FORM)
+
+    @ROUTES.route('GET', '/delete_song')
+    def handle_song_delete_form(self, query):
             """Show a simple HTML form for deleting song."""
+            self.send_static_page(pages.SONG_DELETE_FORM)
             
-            html = """
-            <html>
-            <head><title>Delete Song</title></head>
-            <body>
-                <h1>Delete</h1>
-                <form method="POST" action="/delete_song">
-                    <p>Song ID: <input type="number" name="id"></p>
-                    <input type="submit" value="Delete">
-                </form>
-                <p><a href="/">Back to Home</a></p>
-            </body>
-            </html>
-            """
-            self.send_html_response(html)
-            
-    def handle_login_form(self):
+    @ROUTES.route('GET', '/login')
+    def handle_login_form(self, query):
         # If already logged in, go to dashboard
         if self.get_current_user_id():
             self.redirect('/dashboard')
-        html = """
-        <html>
-        <head><title>Login</title></head>
-        <body>
-            <h1>Login</h1>
-            <form method="POST" action="/login">
-                <p>Email: <input type="email" name="email"></p>
-                <p>Password: <input type="password" name="password"></p>
-                <input type="submit" value="Login" style="margin-bottom: 10px; display: block;">
-            </form> 
-            
-            <p>New user? <a href="/register_user">Register here</a></p>
-            <p><a href="/">Back to Home</a></p>
-        </body>
-        </html>
-        """
-        self.send_html_response(html)
+            return
+        self.send_static_page(pages.LOGIN_FORM)
 
-    def handle_dashboard(self):
+    @ROUTES.route('GET', '/dashboard')
+    def handle_dashboard(self, query):
         """Show user info and list of songs for that user."""
         
         user_id = self.get_current_user_id()
         if not user_id:
             self.redirect('/')
+            return
 
         user_row = get_user_by_id(user_id)
         if not user_row:
             self.send_html_response("<h1>User not found</h1>", 404)
+            return
 
         # Show a simple "Admin panel" if super_admin or artist_manager
         # If user is an artist, maybe show a simpler view
         role = user_row[4]  # role
         if role == 'super_admin':
-            html = f"""
-            <html>
-            <head><title>Dashboard</title></head>
-            <body>
-                <h1>Dashboard (Super Admin)</h1>
-                <p><a href="/users">Manage Users</a></p>
-                <p><a href="/artists">Manage Artists</a></p>
-                <p><a href="/songs">Manage Songs</a></p>
-                <p><a href="/artist_import_form">Import Artists (CSV)</a></p>
-                <p><a href="/artist_export">Export Artists (CSV)</a></p>
-                <p><a href="/logout">Logout</a></p>
-            </body>
-            </html>
-            """
+            self.send_html_response(pages.SUPER_ADMIN_DASHBOARD.render(
+                stats=self.render_catalog_stats(by_user=True)))
         elif role == 'artist_manager':
-            html = f"""
-            <html>
-            <head><title>Dashboard</title></head>
-            <body>
-                <h1>Dashboard (Artist Manager)</h1>
-                <p><a href="/artists">Manage Artists</a></p>
-                <p><a href="/songs">Manage Songs</a></p>
-                <p><a href="/artist_import_form">Import Artists (CSV)</a></p>
-                <p><a href="/artist_export">Export Artists (CSV)</a></p>
-                <p><a href="/logout">Logout</a></p>
-            </body>
-            </html>
-            """
+            self.send_html_response(pages.ARTIST_MANAGER_DASHBOARD.render(
+                stats=self.render_catalog_stats()))
         else:
             # role == 'artist'
             # Just show songs for this user
-
             songs = list_songs_for_user(user_id)
-            list_html = "<ul>"
             if songs:
-                for sid, album, stype in songs:
-                    list_html += f"<li>{album} ({stype})</li>"
-                list_html += "</ul>"
+                songs_html = pages.ARTIST_DASHBOARD_SONGS.render_into(
+                    Fragment(), items=pages.SONG_ITEM.render_rows(songs))
             else:
-                list_html = "<p>No songs found.</p>"
-            html = f"""
-            <html>
-            <head><title>Dashboard</title></head>
-            <body>
-                <h1>Dashboard (Artist)</h1>
-                <h2>Your Songs:</h2>
-                {list_html}
-                <p><a href="/songs">Manage Songs</a></p>
-                <p><a href="/logout">Logout</a></p>
-            </body>
-            </html>
-            """
-
-        self.send_html_response(html)
+                songs_html = pages.ARTIST_DASHBOARD_NO_SONGS.render_into(Fragment())
+            self.send_html_response(pages.ARTIST_DASHBOARD.render(songs=songs_html))
 
+    @ROUTES.route('GET', '/users', roles=ADMIN_ONLY)
     def handle_list_users(self, query):
         """List users with pagination (super_admin only)."""
-        if not self.check_role(['super_admin']):
-            self.send_html_response("<h1>Access Denied</h1>", 403)
+
+        if self.check_not_modified('user'):
             return
 
-        page = int(query.get('page', [1])[0])
-        limit = int(query.get('limit', [5])[0])
-        users = list_users_paginated(page=page, limit=limit)
+        page_params = self.get_page_params(query)
+        if page_params is None:
+            self.send_html_response("<h1>Invalid page parameters</h1>", 400)
+            return
+        after, before, limit = page_params
+        users = list_users_paginated(after=after, before=before, limit=limit)
 
-        html = "<h1>User List</h1><table border='1'>"
-        html += "<tr><th>ID</th><th>Name</th><th>Email</th><th>Role</th></tr>"
-        for (uid, fname, lname, email, role) in users:
-            html += f"<tr><td>{uid}</td><td>{fname} {lname}</td><td>{email}</td><td>{role}</td></tr>"
-        html += "</table>"
-        html += f"<p>Page: {page}</p>"
-        html += f"<p><a href='/update_user'>Update User</a></p>"
-        html += f"<p><a href='/delete_user'>Delete User</a></p>"
-        html += f"<p><a href='/dashboard'>Back to Dashboard</a></p>"
-        self.send_html_response(html)
+        self.send_html_response(pages.USER_LIST.render(
+            rows=pages.USER_ROW.render_rows(users),
+            page_links=self.page_links('/users', users, after, before, limit),
+        ))
 
+    @ROUTES.route('GET', '/artists', roles=ADMIN_OR_MANAGER)
     def handle_list_artists(self, query):
         """List artists with pagination. super_admin or artist_manager only."""
-        if not self.check_role(['super_admin','artist_manager']):
-            self.send_html_response("<h1>Access Denied</h1>", 403)
-            return
-
-        page = int(query.get('page', [1])[0])
-        limit = int(query.get('limit', [5])[0])
-        artists = list_artists_paginated(page=page, limit=limit)
-
-        html = "<h1>Artist List</h1><table border='1'>"
-        html += "<tr><th>ID</th>Name<th></th><th>Gender</th><th>First Release Year</th><th>#Albums</th><th>Actions</th></tr>"
-        for (aid, user_id, name, gender, first_release, no_albums) in artists:
-            html += f"<tr><td>{aid}</td><td>{name}</td><td>{gender}</td><td>{first_release}</td><td>{no_albums}</td>"
-            # Button to see songs for this artist:
-            html += f"<td><a href='/artist_songs?artist_id={aid}'>View Songs</a></td></tr>"
-        html += "</table>"
-        html += f"<p>Page: {page}</p>"
-        html += f"<p><a href='/register_artist'>Create Artist</a></p>"
-        html += f"<p><a href='/update_artist'>Update Artist</a></p>"
-        html += f"<p><a href='/delete_artist'>Delete Artist</a></p>"
-        html += f"<p><a href='/dashboard'>Back to Dashboard</a></p>"
-        self.send_html_response(html)
 
+        if self.check_not_modified('artist'):
+            return
+
+        page_params = self.get_page_params(query)
+        if page_params is None:
+            self.send_html_response("<h1>Invalid page parameters</h1>", 400)
+            return
+        after, before, limit = page_params
+        artists = list_artists_paginated(after=after, before=before, limit=limit)
+
+        self.send_html_response(pages.ARTIST_LIST.render(
+            rows=pages.ARTIST_ROW.render_rows(artists),
+            page_links=self.page_links('/artists', artists, after, before, limit),
+        ))
+
+    @ROUTES.route('GET', '/songs', roles=ADMIN_OR_MANAGER)
     def handle_list_songs(self, query):
         """List songs with pagination. super_admin or artist_manager only."""
-        if not self.check_role(['super_admin','artist_manager']):
-            self.send_html_response("<h1>Access Denied</h1>", 403)
             
-        page = int(query.get('page', [1])[0])
-        limit = int(query.get('limit', [5])[0])
-        songs = list_songs_paginated(page=page, limit=limit)
-
-        html = "<h1>Song List</h1><table border='1'>"
-        html += "<tr><th>ID</th><th>Artist ID</th><th>Album Name</th><th>Type</th></tr>"
-        for (sid, artist_id, album_name, stype) in songs:
-            html += f"<tr><td>{sid}</td><td>{artist_id}</td><td>{album_name}</td><td>{stype}</td></tr>"
-        html += "</table>"
-        html += f"<p>Page: {page}</p>"
-        html += f"<p><a href='/register_song'>Create Song</a></p>"
-        html += f"<p><a href='/update_song'>Update Song</a></p>"
-        html += f"<p><a href='/delete_song'>Delete Song</a></p>"
-        html += f"<p><a href='/dashboard'>Back to Dashboard</a></p>"
-        self.send_html_response(html)
+        if self.check_not_modified('song'):
+            return
+
+        page_params = self.get_page_params(query)
+        if page_params is None:
+            self.send_html_response("<h1>Invalid page parameters</h1>", 400)
+            return
+        after, before, limit = page_params
+        songs = list_songs_paginated(after=after, before=before, limit=limit)
+
+        self.send_html_response(pages.SONG_LIST.render(
+            rows=pages.SONG_ROW.render_rows(songs),
+            page_links=self.page_links('/songs', songs, after, before, limit),
+        ))
 
+    @ROUTES.route('GET', '/artist_songs', roles=ADMIN_OR_MANAGER)
     def handle_artist_songs(self, query):
         """Show a list of songs for a particular artist."""
-        if not self.check_role(['super_admin','artist_manager']):
-            self.send_html_response("<h1>Access Denied</h1>", 403)
-            return
 
         artist_id = query.get('artist_id', [None])[0]
         if not artist_id:
             self.send_html_response("<h1>Missing artist_id</h1>", 400)
             return
 
+        if self.check_not_modified('song'):
+            return
+
+        # Not paginated, so stream the rows rather than building the page.
         songs = list_songs_for_artist(artist_id)
-        html = f"<h1>Artist {artist_id} Songs</h1><ul>"
-        if songs:
-            for (mid, album_name, stype) in songs:
-                html += f"<li>{album_name} ({stype})</li>"
-        else:
-            html += "<li>No songs found.</li>"
-        html += "</ul>"
-        html += "<p><a href='/artists'>Back to Artists</a></p>"
-        self.send_html_response(html)
+        def chunks():
+            yield pages.ARTIST_SONGS_HEAD.render(artist_id=artist_id)
+            if songs:
+                yield from pages.SONG_ITEM.iter_rows(songs)
+            else:
+                yield pages.ARTIST_SONGS_EMPTY
+            yield pages.ARTIST_SONGS_TAIL
 
-    def handle_artist_export(self):
-        """Export all artists to CSV (super_admin or artist_manager)."""
-        if not self.check_role(['super_admin','artist_manager']):
-            self.send_html_response("<h1>Access Denied</h1>", 403)
+        self.send_stream_response('text/html; charset=utf-8', chunks())
+
+    @ROUTES.route('GET', '/search', roles=ADMIN_OR_MANAGER)
+    def handle_search(self, query):
+        """
+        Full-text search of songs or artists (`in=songs|artists`) for the
+        words in `q`, each matched as a prefix. Results are ranked, so pages
+        are addressed by `offset` rather than by id.
+        """
+        text = query.get('q', [''])[0].strip()
+        kind = query.get('in', ['songs'])[0]
+        if kind not in ('songs', 'artists'):
+            kind = 'songs'
+        try:
+            offset = max(0, int(query.get('offset', [0])[0]))
+            limit = max(1, min(int(query.get('limit', [SEARCH_PAGE_SIZE])[0]), MAX_PAGE_SIZE))
+        except ValueError:
+            self.send_html_response("<h1>Invalid page parameters</h1>", 400)
             return
+
+        if self.check_not_modified('song', 'artist'):
+            return
+
+        results = Fragment()
+        if text:
+            search, results_page, row = {
+                'songs': (search_songs, pages.SEARCH_SONG_RESULTS, pages.SEARCH_SONG_ROW),
+                'artists': (search_artists, pages.SEARCH_ARTIST_RESULTS, pages.ARTIST_ROW),
+            }[kind]
+            # One extra row tells whether there is a next page.
+            rows = search(text, limit=limit + 1, offset=offset)
+            if rows or offset:
+                results_page.render_into(
+                    results,
+                    rows=row.render_rows(rows[:limit]),
+                    page_links=self.search_links(text, kind, offset, limit, len(rows) > limit),
+                )
+            else:
+                pages.SEARCH_NO_RESULTS.render_into(results)
+
+        self.send_html_response(pages.SEARCH_PAGE.render(
+            q=text,
+            songs_selected=Markup(" selected" if kind == 'songs' else ""),
+            artists_selected=Markup(" selected" if kind == 'artists' else ""),
+            results=results,
+        ))
+
+    def search_links(self, text, kind, offset, limit, has_next):
+        """Render Previous/Next links for a page of search results."""
+        links = []
+        if offset > 0:
+            links.append((max(0, offset - limit), 'Previous'))
+        if has_next:
+            links.append((offset + limit, 'Next'))
+        html = Fragment()
+        for i, (link_offset, label) in enumerate(links):
+            if i:
+                html.append(pages.LINK_SEPARATOR)
+            link_query = urllib.parse.urlencode({'q': text, 'in': kind, 'offset': link_offset, 'limit': limit})
+            pages.SEARCH_LINK.render_into(html, query=link_query, label=label)
+        return pages.PAGE_LINKS.render_into(Fragment(), links=html)
+
+    @ROUTES.route('GET', '/artist_export', roles=ADMIN_OR_MANAGER)
+    def handle_artist_export(self, query):
+        """Export all artists to CSV (super_admin or artist_manager)."""
         
-        csv_data = export_artists_csv()
-        # Send as a CSV file download
-        self.send_response(200)
-        self.send_header('Content-Type', 'text/csv; charset=utf-8')
-        self.send_header('Content-Disposition', 'attachment; filename="artists.csv"')
-        self.end_headers()
-        self.wfile.write(csv_data.encode('utf-8'))
+        if self.check_not_modified('artist'):
+            return
 
-    def handle_artist_import_form(self):
+        # Send as a CSV file download, streamed batch by batch
+        self.send_stream_response(
+            'text/csv; charset=utf-8',
+            iter_artists_csv(),
+            headers=[('Content-Disposition', 'attachment; filename="artists.csv"')],
+        )
+
+    @ROUTES.route('GET', '/song_export', roles=ADMIN_OR_MANAGER)
+    def handle_song_export(self, query):
+        """Export all songs as CSV or, with format=ndjson, NDJSON (streamed)."""
+        format = query.get('format', ['csv'])[0]
+        if format not in SONG_IMPORT_FORMATS:
+            self.send_html_response("<h1>Unknown export format</h1>", 400)
+            return
+
+        if self.check_not_modified('song'):
+            return
+
+        content_type = 'text/csv; charset=utf-8' if format == 'csv' else 'application/x-ndjson'
+        self.send_stream_response(
+            content_type,
+            iter_songs_export(format),
+            headers=[('Content-Disposition', f'attachment; filename="songs.{format}"')],
+        )
+
+    @ROUTES.route('GET', '/song_import_form', roles=ADMIN_OR_MANAGER)
+    def handle_song_import_form(self, query):
+        """Show a form to paste CSV or NDJSON songs for import."""
+        self.send_static_page(pages.SONG_IMPORT_FORM)
+
+    @ROUTES.route('GET', '/artist_import_form', roles=ADMIN_OR_MANAGER)
+    def handle_artist_import_form(self, query):
         """Show a form to upload CSV for import."""
-        if not self.check_role(['super_admin','artist_manager']):
-            self.send_html_response("<h1>Access Denied</h1>", 403)
-            return
-        html = """
-        <html>
-        <head><title>Import Artists (CSV)</title></head>
-        <body>
-            <h1>Import Artists (CSV)</h1>
-            <form method="POST" action="/artist_import_form" enctype="application/x-www-form-urlencoded">
-                <p>Paste CSV content here:</p>
-                <textarea name="csv_content" rows="10" cols="50"></textarea><br>
-                <input type="submit" value="Import">
-            </form>
-            <p><a href="/dashboard">Back to Dashboard</a></p>
-        </body>
-        </html>
+        self.send_static_page(pages.ARTIST_IMPORT_FORM)
+
+    @ROUTES.route('GET', '/cache_stats', roles=ADMIN_ONLY)
+    def handle_cache_stats(self, query):
+        """Show entity cache and login admission counters (super_admin only)."""
+        rows = [
+            (name, stats['size'], stats['maxsize'], stats['hits'], stats['misses'], stats['evictions'])
+            for name, stats in cache_stats().items()
+        ]
+        self.send_html_response(pages.CACHE_STATS.render(
+            rows=pages.CACHE_STATS_ROW.render_rows(rows),
+            client_rejections=LOGIN_CLIENT_LIMITER.rejections,
+            email_rejections=LOGIN_EMAIL_LIMITER.rejections,
+            inflight_limit=LOGIN_INFLIGHT.limit,
+            inflight_rejections=LOGIN_INFLIGHT.rejections,
+        ))
+
+    # ------------------------
+    # JSON API (GET)
+    # ------------------------
+
+    def get_api_fields(self, query, allowed, default):
+        """
+        The column names selected by the `fields=a,b` query parameter (or
+        `default`), validated against `allowed`; id always comes first.
+        Raises ValueError for unknown names.
         """
-        self.send_html_response(html)
+        fields = query.get('fields', [None])[0]
+        fields = tuple(name.strip() for name in fields.split(',') if name.strip()) if fields else ()
+        names, _ = projection(fields or default, allowed)
+        return names
+
+    def send_api_page(self, query, table, allowed, default, list_page):
+        """Send one page from list_page(after, before, limit, fields) as JSON."""
+        page_params = self.get_page_params(query, default_limit=API_DEFAULT_PAGE_SIZE)
+        if page_params is None:
+            self.send_json_response({'error': 'Invalid page parameters'}, 400)
+            return
+        try:
+            names = self.get_api_fields(query, allowed, default)
+        except ValueError as e:
+            self.send_json_response({'error': str(e)}, 400)
+            return
+        if self.check_not_modified(table):
+            return
+        after, before, limit = page_params
+        rows = list_page(after=after, before=before, limit=limit, fields=names)
+        prev_before, next_after = self.page_cursors(rows, after, before, limit)
+        self.send_json_response({
+            'data': [dict(zip(names, row)) for row in rows],
+            'prev_before': prev_before,
+            'next_after': next_after,
+        })
+
+    def send_api_item(self, query, table, allowed, get_by_id):
+        """Send the row get_by_id(id) returns (its columns are `allowed`) as JSON."""
+        try:
+            item_id = int(query.get('id', [''])[0])
+        except ValueError:
+            self.send_json_response({'error': 'id must be an integer'}, 400)
+            return
+        try:
+            names = self.get_api_fields(query, allowed, allowed)
+        except ValueError as e:
+            self.send_json_response({'error': str(e)}, 400)
+            return
+        if self.check_not_modified(table):
+            return
+        # The by-id readers are cached, so project the cached row.
+        row = get_by_id(item_id)
+        if row is None:
+            self.send_json_response({'error': 'Not found'}, 404)
+            return
+        record = dict(zip(allowed, row))
+        self.send_json_response({'data': {name: record[name] for name in names}})
+
+    @ROUTES.route('GET', '/api/users', roles=ADMIN_ONLY)
+    def handle_api_list_users(self, query):
+        self.send_api_page(query, 'user', USER_FIELDS, USER_FIELDS, list_users_paginated)
 
-    def handle_logout(self):
+    @ROUTES.route('GET', '/api/user', roles=ADMIN_ONLY)
+    def handle_api_get_user(self, query):
+        self.send_api_item(query, 'user', USER_FIELDS, get_user_by_id)
+
+    @ROUTES.route('GET', '/api/artists', roles=ADMIN_OR_MANAGER)
+    def handle_api_list_artists(self, query):
+        self.send_api_page(query, 'artist', ARTIST_FIELDS, ARTIST_FIELDS, list_artists_paginated)
+
+    @ROUTES.route('GET', '/api/artist', roles=ADMIN_OR_MANAGER)
+    def handle_api_get_artist(self, query):
+        self.send_api_item(query, 'artist', ARTIST_FIELDS, get_artist_by_id)
+
+    @ROUTES.route('GET', '/api/songs', roles=ADMIN_OR_MANAGER)
+    def handle_api_list_songs(self, query):
+        self.send_api_page(query, 'song', SONG_FIELDS, SONG_LIST_FIELDS, list_songs_paginated)
+
+    @ROUTES.route('GET', '/api/song', roles=ADMIN_OR_MANAGER)
+    def handle_api_get_song(self, query):
+        self.send_api_item(query, 'song', SONG_FIELDS, get_song_by_id)
+
+    @ROUTES.route('GET', '/api/artist_songs', roles=ADMIN_OR_MANAGER)
+    def handle_api_artist_songs(self, query):
+        try:
+            artist_id = int(query.get('artist_id', [''])[0])
+        except ValueError:
+            self.send_json_response({'error': 'artist_id must be an integer'}, 400)
+            return
+        try:
+            names = self.get_api_fields(query, SONG_FIELDS, ARTIST_SONG_FIELDS)
+        except ValueError as e:
+            self.send_json_response({'error': str(e)}, 400)
+            return
+        if self.check_not_modified('song'):
+            return
+        rows = list_songs_for_artist(artist_id, fields=names)
+        self.send_json_response({'data': [dict(zip(names, row)) for row in rows]})
+
+    @ROUTES.route('GET', '/logout')
+    def handle_logout(self, query):
         """Clear the session cookie (if any)."""
-        session_id = None
-        cookie_header = self.headers.get('Cookie')
-        if cookie_header:
-            for kv in cookie_header.split(';'):
-                kv = kv.strip()
-                if '=' in kv:
-                    key, value = kv.split('=', 1)
-                    if key == 'session_id':
-                        session_id = value
-                        break
-        if session_id and session_id in SESSIONS:
-            del SESSIONS[session_id]
-
-        # Redirect to home
-        self.send_response(302)
-        self.send_header('Location', '/')
-        # Overwrite the cookie
-        self.send_header('Set-Cookie', 'session_id=; Max-Age=0')
-        self.end_headers()
+        session_id = self.get_session_id()
+        if session_id and config.SESSION_MODE == "signed":
+            SESSION_TOKENS.revoke(session_id)
+        elif session_id:
+            SESSIONS.remove(session_id)
+
+        # Redirect to home, overwriting the cookie
+        self.redirect('/', headers=[('Set-Cookie', 'session_id=; Max-Age=0')])
 
     # ------------------------
     # Route Handlers (POST)
     # ------------------------
 
+    @ROUTES.route('POST', '/register_user')
     def handle_register_submit(self, form_data):
         first_name = form_data.get('first_name', [''])[0]
         last_name = form_data.get('last_name', [''])[0]
@@ -696,22 +926,73 @@ class MyHandler(http.server.BaseHTTPRequestHandler):
 
         except Exception as e:
             # Possibly an IntegrityError if email is already taken
-            html = f"<h1>Error creating user: {e}</h1><p><a href='/register'>Try again</a></p>"
-            self.send_html_response(html, 400)
+            self.send_html_response(pages.ERROR_PAGE.render(
+                message=f"Error creating user: {e}", retry='/register'), 400)
 
+    @ROUTES.route('POST', '/artist_import_form', roles=ADMIN_OR_MANAGER)
     def handle_artist_import(self, form_data):
         """Handle CSV import for artists."""
-        # if not self.check_role(['super_admin','artist_manager']):
-        #     self.send_html_response("<h1>Access Denied</h1>", 403)
-        #     return
         csv_content = form_data.get('csv_content', [''])[0]
         try:
-            import_artists_csv(csv_content)
-            self.send_html_response("<h1>Import Successful</h1><p><a href='/dashboard'>Back</a></p>")
+            result = import_artists_csv(csv_content)
+        except Exception as e:
+            self.send_html_response(pages.ERROR_PAGE.render(
+                message=f"Error importing CSV: {e}", retry='/artist_import_form'), 400)
+            return
+
+        self.send_html_response(self.render_import_result(result, '/artist_import_form'))
+
+    @ROUTES.route('POST', '/song_import_form', roles=ADMIN_OR_MANAGER)
+    def handle_song_import(self, form_data):
+        """Handle CSV / NDJSON import for songs."""
+        content = form_data.get('content', [''])[0]
+        format = form_data.get('format', ['csv'])[0]
+        if format not in SONG_IMPORT_FORMATS:
+            self.send_html_response(pages.ERROR_PAGE.render(
+                message=f"Error importing songs: format must be one of {', '.join(SONG_IMPORT_FORMATS)}",
+                retry='/song_import_form'), 400)
+            return
+        try:
+            result = import_songs(content, format)
         except Exception as e:
-            html = f"<h1>Error importing CSV: {e}</h1><p><a href='/artist_import_form'>Try again</a></p>"
-            self.send_html_response(html, 400)
+            self.send_html_response(pages.ERROR_PAGE.render(
+                message=f"Error importing songs: {e}", retry='/song_import_form'), 400)
+            return
+        self.send_html_response(self.render_import_result(result, '/song_import_form'))
+
+    @ROUTES.route('POST', '/api/batch', roles=ADMIN_OR_MANAGER)
+    def handle_api_batch(self, document):
+        """
+        Apply a JSON list of create/update/delete operations (see batch.py),
+        given as the body or as {"operations": [...]}, in one transaction.
+        Managers may change artists and songs; users need super_admin.
+        """
+        operations = document.get('operations') if isinstance(document, dict) else document
+        if self.get_current_user_role() == 'super_admin':
+            entities = ('user', 'artist', 'song')
+        else:
+            entities = ('artist', 'song')
+        try:
+            results = apply_batch(operations, entities)
+        except BatchError as e:
+            self.send_json_response({'error': str(e), 'index': e.index}, 409 if e.conflict else 400)
+            return
+
+        # Keep logged-in sessions in step, as the user update/delete forms do.
+        for operation, result in zip(operations, results):
+            if result['entity'] != 'user' or result['op'] == 'create':
+                continue
+            if result['op'] == 'delete':
+                SESSIONS.remove_user(result['id'])
+            elif 'role' in operation.get('fields', {}):
+                SESSIONS.update_role(result['id'], operation['fields']['role'])
+            else:
+                continue
+            if config.SESSION_MODE == "signed":
+                SESSION_TOKENS.revoke_user(result['id'])
+        self.send_json_response({'results': results})
 
+    @ROUTES.route('POST', '/update_user')
     def handle_update_user_submit(self, form_data):
         # Parse the form values (each value is a list; we take the first element)
         user_id = form_data.get('id', [''])[0]
@@ -759,12 +1040,17 @@ class MyHandler(http.server.BaseHTTPRequestHandler):
             return
         # Now call update_user with all the fields
         update_user(user_id[0], **fields_to_update)
+        if role:
+            # Sessions cache the role; keep logged-in sessions in step.
+            # Signed tokens carry it, so they are revoked instead.
+            SESSIONS.update_role(user_id[0], role)
+            if config.SESSION_MODE == "signed":
+                SESSION_TOKENS.revoke_user(user_id[0])
 
         # Optionally, redirect to the dashboard or another page after updating
-        self.send_response(302)
-        self.send_header('Location', '/dashboard')
-        self.end_headers()
+        self.redirect('/dashboard')
 
+    @ROUTES.route('POST', '/delete_user')
     def handle_delete_user_submit(self, form_data):
         # Parse the form values (we take the first value)
         user_id = form_data.get("user_id",[''])[0]
@@ -772,15 +1058,16 @@ class MyHandler(http.server.BaseHTTPRequestHandler):
             user_obj = get_user_by_id(user_id)
             if user_obj:
                 delete_user(user_id)
-                self.send_response(302)
-                self.send_header('Location', '/dashboard')
-                self.end_headers()
+                SESSIONS.remove_user(user_obj[0])
+                if config.SESSION_MODE == "signed":
+                    SESSION_TOKENS.revoke_user(user_obj[0])
+                self.redirect('/dashboard')
             else:
-                self.send_html_response(f"<h1>Error: User with user_id {user_id} doesnot exist.", 401)
-
-        if user_id is None:
+                self.send_html_response(pages.ERROR_MESSAGE.render(message=f"Error: User with user_id {user_id} doesnot exist."), 401)
+        else:
             self.send_html_response("<h1>Error: User ID is required and is positive integer type.", 401)
 
+    @ROUTES.route('POST', '/register_artist')
     def handle_artist_register_submit(self, form_data):
         user_id = form_data.get('user_id', [''])[0]
         name = form_data.get('name', [''])[0]
@@ -794,14 +1081,13 @@ class MyHandler(http.server.BaseHTTPRequestHandler):
         try:
             create_artist(user_id, name, dob, gender, address, first_release_year, no_of_albums_released)
             # After registration, let's redirect them to home or login
-            self.send_response(302)
-            self.send_header('Location', '/dashboard')
-            self.end_headers()
+            self.redirect('/dashboard')
         except Exception as e:
             # Possibly an IntegrityError if email is already taken
-            html = f"<h1>Error creating artist user: {e}</h1><p><a href='/register_user'>Try again</a></p>"
-            self.send_html_response(html, 400)
+            self.send_html_response(pages.ERROR_PAGE.render(
+                message=f"Error creating artist user: {e}", retry='/register_user'), 400)
 
+    @ROUTES.route('POST', '/update_artist')
     def handle_artist_update_submit(self, form_data):
         # Parse the form values (each value is a list; we take the first element)
         artist_id = form_data.get('id', [''])[0]
@@ -835,17 +1121,17 @@ class MyHandler(http.server.BaseHTTPRequestHandler):
 
         # Get the current user's id (assumes you have a function like get_current_user_id)
         artist_obj = get_artist_by_id(artist_id)  # Adjust according to your session handling
-        if artist_id is None:
-            self.send_html_response(f"<h1>Error: Artist with artist id {artist_id} does not exist!</h1>", 401)
+        if artist_obj is None:
+            self.send_html_response(pages.ERROR_MESSAGE.render(message=f"Error: Artist with artist id {artist_id} does not exist!"), 401)
+            return
 
         # Now call update_user with all the fields
         update_artist(artist_id, **fields_to_update)
 
         # Optionally, redirect to the dashboard or another page after updating
-        self.send_response(302)
-        self.send_header('Location', '/dashboard')
-        self.end_headers()
+        self.redirect('/dashboard')
 
+    @ROUTES.route('POST', '/delete_artist')
     def handle_delete_artist_submit(self, form_data):
         # Parse the form values (we take the first value)
         artist_id = form_data.get("artist_id",[''])[0]
@@ -853,15 +1139,13 @@ class MyHandler(http.server.BaseHTTPRequestHandler):
             artist_obj = get_artist_by_id(artist_id)
             if artist_obj:
                 delete_artist(artist_id)
-                self.send_response(302)
-                self.send_header('Location', '/dashboard')
-                self.end_headers()
+                self.redirect('/dashboard')
             else:
-                self.send_html_response(f"<h1>Error: Artist with artist_id {artist_id} doesnot exist.", 401)
-
-        if artist_id is None:
+                self.send_html_response(pages.ERROR_MESSAGE.render(message=f"Error: Artist with artist_id {artist_id} doesnot exist."), 401)
+        else:
             self.send_html_response("<h1>Error: Artist ID is required and is positive integer type.", 401)
 
+    @ROUTES.route('POST', '/register_song')
     def handle_song_register_submit(self, form_data):
         artist_id = form_data.get('artist_id', [''])[0]
         title = form_data.get('title', [''])[0]
@@ -872,15 +1156,14 @@ class MyHandler(http.server.BaseHTTPRequestHandler):
         try:
             create_song(artist_id, title, album_name, genre)
             # After registration, let's redirect them to home or login
-            self.send_response(302)
-            self.send_header('Location', '/dashboard')
-            self.end_headers()
+            self.redirect('/dashboard')
 
         except Exception as e:
             # Possibly an IntegrityError if email is already taken
-            html = f"<h1>Error creating song: {e}</h1><p><a href='/register_song'>Try again</a></p>"
-            self.send_html_response(html, 400)
+            self.send_html_response(pages.ERROR_PAGE.render(
+                message=f"Error creating song: {e}", retry='/register_song'), 400)
 
+    @ROUTES.route('POST', '/update_song')
     def handle_song_update_submit(self, form_data):
         # Parse the form values (each value is a list; we take the first element)
         song_id = form_data.get('id', [''])[0]
@@ -908,16 +1191,16 @@ class MyHandler(http.server.BaseHTTPRequestHandler):
         # Get the current user's id (assumes you have a function like get_current_user_id)
         song_obj = get_song_by_id(song_id)  # Adjust according to your session handling
         if song_obj is None:
-            self.send_html_response(f"<h1>Error: song with song id {song_id} does not exist!</h1>", 401)
+            self.send_html_response(pages.ERROR_MESSAGE.render(message=f"Error: song with song id {song_id} does not exist!"), 401)
+            return
 
         # Now call update_user with all the fields
         update_song(song_id, **fields_to_update)
 
         # Optionally, redirect to the dashboard or another page after updating
-        self.send_response(302)
-        self.send_header('Location', '/dashboard')
-        self.end_headers()
+        self.redirect('/dashboard')
 
+    @ROUTES.route('POST', '/delete_song')
     def handle_song_delete_submit(self, form_data):
         # Parse the form values (we take the first value)
         song_id = form_data.get("id",[''])[0]
@@ -925,29 +1208,41 @@ class MyHandler(http.server.BaseHTTPRequestHandler):
             song_obj = get_song_by_id(song_id)
             if song_obj:
                 delete_song(song_id)
-                self.send_response(302)
-                self.send_header('Location', '/dashboard')
-                self.end_headers()
+                self.redirect('/dashboard')
             else:
-                self.send_html_response(f"<h1>Error: Song with song_id {song_id} doesnot exist.", 401)
-
-        if song_id is None:
+                self.send_html_response(pages.ERROR_MESSAGE.render(message=f"Error: Song with song_id {song_id} doesnot exist."), 401)
+        else:
             self.send_html_response("<h1>Error: Song ID is required and is positive integer type.", 401)
         
 
+    @ROUTES.route('POST', '/login')
     def handle_login_submit(self, form_data):
         email = form_data.get('email', [''])[0]
         password = form_data.get('password', [''])[0]
-        user_info = login(email, password)
+
+        # Cheap checks first: a rejected client does not use up the email's budget.
+        retry_after = (LOGIN_CLIENT_LIMITER.hit(self.get_client_ip())
+                       or LOGIN_EMAIL_LIMITER.hit(email.strip().lower()))
+        if retry_after:
+            self.send_too_many_requests(retry_after)
+            return
+        if not LOGIN_INFLIGHT.try_acquire():
+            self.send_too_many_requests(1)
+            return
+        try:
+            user_info = login(email, password)
+        finally:
+            LOGIN_INFLIGHT.release()
+
         if user_info:
             # Create session
-            session_id = generate_session_id()
-            SESSIONS[session_id] = user_info["id"]
-            self.send_response(302)
-            self.send_header('Location', '/dashboard')
+            if config.SESSION_MODE == "signed":
+                session_id = SESSION_TOKENS.issue(user_info["id"], user_info["role"])
+            else:
+                session_id = generate_session_id()
+                SESSIONS.add(session_id, user_info["id"], user_info["role"])
             # Set a cookie
-            self.send_header('Set-Cookie', f'session_id={session_id}; HttpOnly')
-            self.end_headers()
+            self.redirect('/dashboard', headers=[('Set-Cookie', f'session_id={session_id}; HttpOnly')])
         else:
             html = "<h1>Invalid credentials</h1><p><a href='/login'>Try again</a></p>"
             self.send_html_response(html, 401)
@@ -955,16 +1250,260 @@ class MyHandler(http.server.BaseHTTPRequestHandler):
 # ---------------------------------------------
 # Run the server
 # ---------------------------------------------
-import socketserver
 
 class MyTCPServer(socketserver.TCPServer):
     allow_reuse_address = True
+    # Serving one connection at a time: an idle kept-alive client would
+    # block every other client until it timed out.
+    keep_alive = False
+
+class ThreadPoolTCPServer(MyTCPServer):
+    """
+    TCPServer that hands each accepted connection to a fixed pool of worker
+    threads. At most `workers` connections are handled at once; while all
+    workers are busy the accept loop blocks and further clients wait in the
+    kernel's listen queue (sized by `backlog`). Connections idling between
+    requests give up their worker as soon as an accepted one is waiting.
+    """
+
+    keep_alive = True
+
+    def __init__(self, server_address, handler_class, workers=8, backlog=64):
+        self.request_queue_size = backlog
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ams-worker")
+        self._slots = threading.BoundedSemaphore(workers)
+        self._waiting = threading.Event()
+        super().__init__(server_address, handler_class)
+
+    def has_waiting_connection(self):
+        return self._waiting.is_set()
+
+    def process_request(self, request, client_address):
+        if not self._slots.acquire(blocking=False):
+            self._waiting.set()
+            self._slots.acquire()
+            self._waiting.clear()
+        try:
+            self._executor.submit(self._process_request_worker, request, client_address)
+        except RuntimeError:
+            # Executor already shut down (server is closing).
+            self._slots.release()
+            self.shutdown_request(request)
 
-def run_server(port=8001):
+    def _process_request_worker(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._slots.release()
+
+    def server_close(self):
+        super().server_close()
+        self._executor.shutdown(wait=True)
+
+SERVER_MODES = ("single", "threaded")
+
+def _make_server(port, mode, threads, backlog, reuse_port=False):
+    server_class = ThreadPoolTCPServer if mode == "threaded" else MyTCPServer
+    # Pre-forked workers each bind their own socket; SO_REUSEPORT lets the
+    # kernel spread incoming connections across them.
+    server_class = type(server_class.__name__, (server_class,), {"allow_reuse_port": reuse_port})
+    if mode == "threaded":
+        return server_class(("0.0.0.0", port), MyHandler, workers=threads, backlog=backlog)
+    return server_class(("0.0.0.0", port), MyHandler)
+
+def _serve_worker(port, mode, threads, backlog):
+    """Body of one pre-forked worker process."""
+    # Start the hashing processes before binding, so they do not inherit
+    # (and keep open) this worker's listening socket.
+    start_pool()
+    httpd = _make_server(port, mode, threads, backlog, reuse_port=True)
+    # shutdown() waits for serve_forever() to return, so call it from
+    # another thread; server_close() then waits for in-flight requests.
+    signal.signal(signal.SIGTERM, lambda signum, frame: threading.Thread(target=httpd.shutdown).start())
+    try:
+        with httpd:
+            httpd.serve_forever()
+    finally:
+        shutdown_pool()
+
+def _prepare_server():
+    """Startup shared by run_server and run_server_async."""
     create_tables()  # Ensure DB tables are created
-    with MyTCPServer(("0.0.0.0", port), MyHandler) as httpd:
-        print(f"serving on port {port}")
-        httpd.serve_forever()
+    print(f"sqlite pragma profile: {describe_pragmas()}")
+    if config.SESSION_MODE == "signed" and not SESSION_TOKENS.keys:
+        raise RuntimeError("AMS_SESSION_MODE=signed requires AMS_SESSION_KEYS")
+    print(f"session mode: {config.SESSION_MODE}")
+
+def _split_login_limits(processes):
+    """
+    Give each of `processes` pre-forked workers its share of the login
+    admission limits and of the hashing processes, so that together they
+    stay close to the configured totals rather than `processes` times them.
+    Rate limits are only approximately global: each worker refills its own
+    buckets, and the kernel spreads a client's connections over the workers.
+    """
+    global LOGIN_CLIENT_LIMITER, LOGIN_EMAIL_LIMITER, LOGIN_INFLIGHT
+    LOGIN_CLIENT_LIMITER = KeyedRateLimiter(
+        config.LOGIN_RATE_PER_CLIENT / processes, max(1, config.LOGIN_BURST_PER_CLIENT // processes))
+    LOGIN_EMAIL_LIMITER = KeyedRateLimiter(
+        config.LOGIN_RATE_PER_EMAIL / processes, max(1, config.LOGIN_BURST_PER_EMAIL // processes))
+    LOGIN_INFLIGHT = ConcurrencyLimiter(max(1, config.LOGIN_MAX_INFLIGHT // processes))
+    if config.HASH_WORKERS > 0:
+        config.HASH_WORKERS = max(1, config.HASH_WORKERS // processes)
+
+def run_server(port=8001, mode="single", workers=8, backlog=64, processes=1, drain_timeout=30):
+    """
+    Start the HTTP server.
+    mode: "single" handles one request at a time, "threaded" uses a bounded
+          pool of `workers` threads with a listen backlog of `backlog`.
+    processes: with more than one, pre-fork that many processes (each running
+          `mode`) sharing the port via SO_REUSEPORT under a supervisor that
+          restarts dead workers and drains them on SIGTERM. The login limits
+          and hashing processes are divided between them.
+    """
+    global SESSIONS
+    if mode not in SERVER_MODES:
+        raise ValueError(f"Unknown server mode {mode!r}, expected one of {SERVER_MODES}")
+    _prepare_server()
+    if processes > 1:
+        # Sessions and cached rows must be valid whichever worker gets the request.
+        if config.SESSION_MODE != "signed" and not isinstance(SESSIONS, SqliteSessionStore):
+            SESSIONS = make_session_store("sqlite")
+        config.CACHE_CROSS_PROCESS = True
+        _split_login_limits(processes)
+        # Children must not inherit the parent's SQLite connection.
+        close_connection()
+        print(f"serving on port {port} ({processes} {mode} worker processes, "
+              f"{workers if mode == 'threaded' else 1} threads each)")
+        PreforkSupervisor(
+            processes, lambda: _serve_worker(port, mode, workers, backlog), drain_timeout=drain_timeout,
+        ).run()
+        return
+    start_pool()
+    try:
+        httpd = _make_server(port, mode, workers, backlog)
+        if mode == "threaded":
+            print(f"serving on port {port} ({workers} worker threads, backlog {backlog})")
+        else:
+            print(f"serving on port {port}")
+        with httpd:
+            httpd.serve_forever()
+    finally:
+        shutdown_pool()
+
+# ---------------------------------------------
+# asyncio server
+# ---------------------------------------------
+
+# Largest request head (request line + headers) the asyncio server accepts.
+MAX_REQUEST_HEAD = 64 * 1024
+
+class LoopWriter:
+    """
+    File-like `wfile` for a handler running on a worker thread. Each write is
+    handed to the event loop and waits until the transport has drained, so a
+    streamed response keeps the same bounded memory as in the threaded server.
+    """
+
+    def __init__(self, writer, loop):
+        self._writer = writer
+        self._loop = loop
+
+    async def _write(self, data):
+        self._writer.write(data)
+        await self._writer.drain()
+
+    def write(self, data):
+        asyncio.run_coroutine_threadsafe(self._write(bytes(data)), self._loop).result()
+        return len(data)
+
+    def flush(self):
+        pass
+
+class AsyncBridgeHandler(MyHandler):
+    """
+    MyHandler driven by the asyncio server: the request has already been read
+    by the event loop, so it is replayed from memory and exactly one request
+    is handled per instance. Routing and handler logic are MyHandler's.
+    """
+
+    def setup(self):
+        # requests_handled counts earlier requests on this connection, so
+        # max_requests applies as in the threaded server.
+        raw_request, self.wfile, self.requests_handled = self.request
+        self.rfile = io.BytesIO(raw_request)
+
+    def handle(self):
+        self.handle_one_request()
+
+    def finish(self):
+        pass
+
+def _content_length(head):
+    for line in head.split(b"\r\n")[1:]:
+        name, _, value = line.partition(b":")
+        if name.strip().lower() == b"content-length":
+            try:
+                return max(0, int(value.strip()))
+            except ValueError:
+                return 0
+    return 0
+
+async def _serve_connection(reader, writer, executor, idle_timeout):
+    loop = asyncio.get_running_loop()
+    peer = writer.get_extra_info("peername") or ("", 0)
+    wfile = LoopWriter(writer, loop)
+    requests_handled = 0
+    try:
+        while True:
+            # Waiting for the next request costs only this coroutine.
+            try:
+                head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), idle_timeout)
+                body = await asyncio.wait_for(reader.readexactly(_content_length(head)), idle_timeout)
+            except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                break
+            handler = await loop.run_in_executor(
+                executor, AsyncBridgeHandler, (head + body, wfile, requests_handled), peer[:2], None)
+            requests_handled = handler.requests_handled
+            if handler.close_connection:
+                break
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+async def _serve_async(port, threads, idle_timeout):
+    executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="ams-async-worker")
+    server = await asyncio.start_server(
+        lambda r, w: _serve_connection(r, w, executor, idle_timeout),
+        "0.0.0.0", port, limit=MAX_REQUEST_HEAD)
+    print(f"serving on port {port} (asyncio, {threads} executor threads)")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        executor.shutdown(wait=True)
+
+def run_server_async(port=8001, threads=8, idle_timeout=config.KEEPALIVE_TIMEOUT):
+    """
+    Serve the same routes as run_server on an asyncio event loop.
+    Connections wait for requests as coroutines; each complete request is
+    handled by MyHandler on one of `threads` executor threads, which is where
+    the blocking SQLite and password-hashing calls run. Connections idle for
+    `idle_timeout` seconds are closed.
+    """
+    _prepare_server()
+    start_pool()
+    try:
+        asyncio.run(_serve_async(port, threads, idle_timeout))
+    finally:
+        shutdown_pool()
 
 if __name__ == "__main__":
     run_server()
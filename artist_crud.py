@@ -1,105 +1,142 @@
-import sqlite3
-import csv
-import io
-from security import verify_password
+import json
 from datetime import datetime
+from db_pool import get_connection, transaction, call_after_transaction
+from cache import cached_by_id, invalidate_id, invalidate_ids, artist_cache
+from user_crud import get_user_by_id, login
+from music_crud import SONG_FIELDS
+from queries import projection, build_update, fts_match_query
+from bulk import csv_rows, batched_import, existing_ids, iter_csv
+
+# Columns a caller may read; get_artist_by_id returns these.
+ARTIST_FIELDS = ("id", "user_id", "name", "gender", "first_release_year", "no_of_albums_released")
+# Columns update_artist may set.
+ARTIST_UPDATE_FIELDS = ("user_id", "name", "dob", "gender", "address", "first_release_year", "no_of_albums_released")
+# Default columns for an artist's song listing.
+ARTIST_SONG_FIELDS = ("id", "album_name", "genre")
 
 def create_artist(user_id, name, dob, gender, address, first_release_year,no_of_albums_released):
-    connection_obj = sqlite3.connect("ams.db")
-    cursor_obj = connection_obj.cursor()
     current_datetime = datetime.now()
     now = current_datetime.isoformat()
-    cursor_obj.execute("""
-    INSERT INTO artist (user_id, name, dob, gender, address, first_release_year, no_of_albums_released, created_at, updated_at)
-    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, (user_id, name, dob, gender, address, first_release_year, no_of_albums_released, now, now)
-    )
-    connection_obj.commit()
-    user_id = cursor_obj.lastrowid
-    connection_obj.close()
+    with transaction() as connection_obj:
+        cursor_obj = connection_obj.cursor()
+        cursor_obj.execute("""
+        INSERT INTO artist (user_id, name, dob, gender, address, first_release_year, no_of_albums_released, created_at, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (user_id, name, dob, gender, address, first_release_year, no_of_albums_released, now, now)
+        )
+        user_id = cursor_obj.lastrowid
+        invalidate_id(artist_cache, user_id)
     return user_id
 
-def update_artist(artist_id,**kwargs):
+def update_artist(artist_id, **kwargs):
     """
     Update fields in the artist record. For example:
       update_artist(3, name="NewName")
+    Only ARTIST_UPDATE_FIELDS may be set (ValueError otherwise).
+    Returns the number of rows updated (0 when no artist has that id).
     """
-    connection_obj = sqlite3.connect("ams.db")
-    cursor_obj = connection_obj.cursor()
-    set_clauses = []
-    values = []
-    for field, value in kwargs.items():
-        set_clauses.append(f"{field} = ?")
-        values.append(value)
-    if not set_clauses:
-        connection_obj.close()
-        return
-    set_clauses.append("updated_at = ?")
-    values.append(datetime.now())
-    set_str = ", ".join(set_clauses)
-    sql = f"UPDATE artist SET {set_str} WHERE id = ?"
-    values.append(artist_id)
-    try:
-        cursor_obj.execute(sql, tuple(values))
-        connection_obj.commit()
-    finally:
-        connection_obj.close()
+    if not kwargs:
+        return 0
+    sql, values = build_update("artist", ARTIST_UPDATE_FIELDS, kwargs)
+    values += [datetime.now(), artist_id]
+    with transaction() as connection_obj:
+        cursor_obj = connection_obj.execute(sql, values)
+        invalidate_id(artist_cache, artist_id)
+    return cursor_obj.rowcount
+
+def update_many_artists(ids, **kwargs):
+    """
+    Set the same fields on every artist in `ids` with one UPDATE statement,
+    e.g. update_many_artists([4, 5, 6], name="NewName")
+    Returns the number of rows updated.
+    """
+    ids = [int(row_id) for row_id in ids]
+    if not kwargs or not ids:
+        return 0
+    sql, values = build_update("artist", ARTIST_UPDATE_FIELDS, kwargs, many=True)
+    values += [datetime.now(), json.dumps(ids)]
+    with transaction() as connection_obj:
+        cursor_obj = connection_obj.execute(sql, values)
+        invalidate_ids(artist_cache, ids)
+    return cursor_obj.rowcount
 
 def delete_artist(artist_id):
-    connection_obj = sqlite3.connect("ams.db")
-    cursor_obj = connection_obj.cursor()
-    try:
-        cursor_obj.execute("DELETE FROM artist WHERE id = ?", (artist_id,))
-        connection_obj.commit()
-    finally:
-        connection_obj.close()
+    with transaction() as connection_obj:
+        cursor_obj = connection_obj.execute("DELETE FROM artist WHERE id = ?", (artist_id,))
+        invalidate_id(artist_cache, artist_id)
+    return cursor_obj.rowcount
 
-def login(email, plain_password):
-    connection_obj = sqlite3.connect("ams.db")
+def list_artists_paginated(after=None, before=None, limit=10, fields=None):
+    """
+    Return one page of artists ordered by id, using the id as a cursor
+    (see user_crud.list_users_paginated). fields: tuple of ARTIST_FIELDS.
+    """
+    _, columns = projection(fields or ARTIST_FIELDS, ARTIST_FIELDS)
+    connection_obj = get_connection()
     cursor_obj = connection_obj.cursor()
-    cursor_obj.execute("SELECT id, email, password, role FROM user WHERE email = ?", (email,))
-    row = cursor_obj.fetchone()
-    connection_obj.close()
-    if not row:
-        return None
-    user_id, user_email, stored_hash, user_role = row
-    if verify_password(stored_hash, plain_password):
-        return {"id": user_id, "email": user_email, "role": user_role}
+    if before is not None:
+        cursor_obj.execute(f"""
+            SELECT {columns}
+            FROM artist
+            WHERE id < ?
+            ORDER BY id DESC
+            LIMIT ?
+        """, (before, limit))
+        rows = cursor_obj.fetchall()
+        rows.reverse()
     else:
-        return None                                                                                                                                                                                                  
-
-def list_artists_paginated(page=1, limit=10):
-    offset = (page - 1) * limit
-    connection_obj = sqlite3.connect("ams.db")
-    cursor_obj = connection_obj.cursor()
-    cursor_obj.execute("""
-        SELECT id, user_id, name, gender, first_release_year, no_of_albums_released
-        FROM artist
-        ORDER BY id ASC
-        LIMIT ? OFFSET ?
-    """, (limit, offset))
-    rows = cursor_obj.fetchall()
-    connection_obj.close()
+        cursor_obj.execute(f"""
+            SELECT {columns}
+            FROM artist
+            WHERE id > ?
+            ORDER BY id ASC
+            LIMIT ?
+        """, (after or 0, limit))
+        rows = cursor_obj.fetchall()
     return rows
 
-def list_songs_for_artist(artist_id):
+def list_songs_for_artist(artist_id, fields=None):
     """
     Return all songs for a particular artist.
     We'll join with the song table in music_crud (or do it here).
+    fields: tuple of SONG_FIELDS, default ARTIST_SONG_FIELDS.
     """
-    connection_obj = sqlite3.connect("ams.db")
+    _, columns = projection(fields or ARTIST_SONG_FIELDS, SONG_FIELDS, "m.")
+    connection_obj = get_connection()
     cursor_obj = connection_obj.cursor()
-    cursor_obj.execute("""
-        SELECT m.id, m.album_name, m.genre
+    cursor_obj.execute(f"""
+        SELECT {columns}
         FROM song AS m
         WHERE m.artist_id = ?
     """, (artist_id,))
     rows = cursor_obj.fetchall()
-    connection_obj.close()
     return rows
 
+def search_artists(text, limit=20, offset=0):
+    """
+    Full-text search of artist names, best matches first; each word matches
+    as a prefix. Returns up to `limit` rows of ARTIST_FIELDS, starting at
+    `offset` in the ranking.
+    """
+    match = fts_match_query(text)
+    if match is None:
+        return []
+    connection_obj = get_connection()
+    cursor_obj = connection_obj.cursor()
+    cursor_obj.execute("""
+        SELECT a.id, a.user_id, a.name, a.gender, a.first_release_year, a.no_of_albums_released
+        FROM artist_fts
+        JOIN artist AS a ON a.id = artist_fts.rowid
+        WHERE artist_fts MATCH ?
+        ORDER BY bm25(artist_fts), a.id
+        LIMIT ? OFFSET ?
+    """, (match, limit, offset))
+    rows = cursor_obj.fetchall()
+    return rows
+
+@cached_by_id(artist_cache)
 def get_artist_by_id(artist_id):
-    connection_obj = sqlite3.connect("ams.db")
+    connection_obj = get_connection()
     cursor_obj = connection_obj.cursor()
     cursor_obj.execute("""
         SELECT id, user_id, name, gender, first_release_year, no_of_albums_released
@@ -107,73 +144,93 @@ def get_artist_by_id(artist_id):
         WHERE id = ?
     """, (artist_id,))
     row = cursor_obj.fetchone()
-    connection_obj.close()
-    return row
-
-def get_user_by_id(user_id):
-    connection_obj = sqlite3.connect("ams.db")
-    cursor_obj = connection_obj.cursor()
-    cursor_obj.execute("SELECT id, first_name, last_name, email, role FROM user WHERE id = ?", (user_id,))
-    row = cursor_obj.fetchone()
-    connection_obj.close()
     return row
 
 # (Add to artist_crud.py)
 
 
-def export_artists_csv():
+def iter_artists_csv(batch_size=500):
     """
-    Return a CSV string containing all artists.
+    Yield the artist table as CSV text, one chunk per `batch_size` rows, so
+    callers can stream an export of any size in bounded memory.
     Each row: id, user_id, stage_name, gender, first_release_year, no_of_albums_released
     """
-    output = io.StringIO()
-    writer = csv.writer(output)
-    # Write header
-    writer.writerow(["id","user_id","name","gender","first_release_year","no_of_albums_released"])
-    
-    conn = sqlite3.connect("ams.db")
+    conn = get_connection()
     cursor = conn.cursor()
     cursor.execute("""
         SELECT id, user_id, name, gender, first_release_year, no_of_albums_released
         FROM artist
         ORDER BY id ASC
     """)
-    rows = cursor.fetchall()
-    conn.close()
-    
-    for row in rows:
-        writer.writerow(row)
-    
-    return output.getvalue()
+    yield from iter_csv(cursor, ARTIST_FIELDS, batch_size)
 
-def import_artists_csv(csv_content):
+def export_artists_csv():
+    """
+    Return a CSV string containing all artists (see iter_artists_csv).
+    """
+    return "".join(iter_artists_csv())
+
+# Columns an import row must provide; dob and address are optional.
+ARTIST_IMPORT_REQUIRED = ("user_id", "name", "gender", "first_release_year", "no_of_albums_released")
+
+def _validate_artist_row(row):
+    """
+    Check one parsed CSV row. Returns (values, None) when the row is valid,
+    where values is (user_id, name, dob, gender, address, first_release_year,
+    no_of_albums_released), or (None, reason) when it is not.
+    """
+    missing = [col for col in ARTIST_IMPORT_REQUIRED if not (row.get(col) or "").strip()]
+    if missing:
+        return None, f"missing value for {', '.join(missing)}"
+    try:
+        user_id = int(row["user_id"])
+        first_release_year = int(row["first_release_year"])
+        no_of_albums = int(row["no_of_albums_released"])
+    except ValueError:
+        return None, "user_id, first_release_year and no_of_albums_released must be integers"
+    if no_of_albums < 0:
+        return None, "no_of_albums_released must not be negative"
+    values = (user_id, row["name"].strip(), row.get("dob") or None, row["gender"].strip(),
+              row.get("address") or None, first_release_year, no_of_albums)
+    return values, None
+
+def _insert_artist_batch(conn, batch, now, rejected):
+    """Insert validated (line_no, values) pairs whose user_id exists; return the count."""
+    known = existing_ids(conn, "user", [values[0] for _, values in batch])
+    params = []
+    for line_no, values in batch:
+        if values[0] in known:
+            params.append(values + (now, now))
+        else:
+            rejected.append((line_no, f"user_id {values[0]} does not exist"))
+    conn.executemany("""
+        INSERT INTO artist (user_id, name, dob, gender, address, first_release_year, no_of_albums_released, created_at, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, params)
+    return len(params)
+
+def import_artists_csv(csv_content, batch_size=500, commit_per_batch=False):
     """
     Parse CSV content and insert rows into the artist table.
-    CSV columns: id, user_id, stage_name, gender, first_release_year, no_of_albums_released
-    *Ignore 'id' from CSV if you want to autoincrement, or handle accordingly.
+    CSV columns: user_id, name, dob, gender, address, first_release_year, no_of_albums_released
+    (an 'id' column, as written by the export, is ignored).
+
+    Rows are validated first and inserted with executemany() in batches of
+    `batch_size`. The whole import runs in one transaction unless
+    commit_per_batch is True, in which case each batch commits on its own.
+    Returns a dict:
+      {"inserted": int, "rejected": [(line_no, reason), ...], "elapsed": seconds}
+    Raises ValueError if the header lacks a required column.
     """
-    f = io.StringIO(csv_content)
-    reader = csv.DictReader(f)
-    conn = sqlite3.connect("ams.db")
-    cursor = conn.cursor()
-    now = datetime.now()
-    
-    for row in reader:
-        # If you want to let 'id' autoincrement, skip row['id']
-        user_id = row['user_id']
-        name = row['name']
-        dob = row['dob']
-        gender = row['gender']
-        address = row['address']
-        first_release_year = row['first_release_year']
-        no_of_albums = int(row['no_of_albums_released'])
-        try:
-            cursor.execute("""
-                INSERT INTO artist (user_id, name, dob, gender, address, first_release_year, no_of_albums_released, created_at, updated_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?,?,?)
-            """, (user_id, name, dob, gender, address, first_release_year, no_of_albums, now, now))
-            conn.commit()
-        except Exception as e:
-            print(e)
-        
-    conn.close()
+    rows = csv_rows(csv_content, ARTIST_IMPORT_REQUIRED)
+    now = datetime.now().isoformat()
+    result = batched_import(
+        rows, _validate_artist_row,
+        lambda conn, batch, rejected: _insert_artist_batch(conn, batch, now, rejected),
+        batch_size, commit_per_batch,
+    )
+
+    # New ids may have been cached as misses; executemany() does not report them.
+    artist_cache.clear()
+    call_after_transaction(artist_cache.clear)
+    return result
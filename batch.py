@@ -0,0 +1,180 @@
+# batch.py
+"""
+Apply a list of create/update/delete operations on users, artists and
+songs as one transaction (POST /api/batch). An operation is a dict:
+
+    {"op": "create", "entity": "artist", "fields": {"user_id": 2, "name": "X", ...}}
+    {"op": "update", "entity": "song", "id": 7, "fields": {"genre": "jazz"}}
+    {"op": "delete", "entity": "user", "id": 3}
+
+An id, or a reference field such as a song's artist_id, may be given as
+"$<n>" to mean the id created by operation n of the same batch.
+"""
+import sqlite3
+from collections import namedtuple
+
+import config
+from bulk import existing_ids
+from db_pool import transaction
+from security import hash_password
+from user_crud import create_user, update_user, delete_user
+from artist_crud import create_artist, update_artist, delete_artist
+from music_crud import create_song, update_song, delete_song
+
+# fields: the create function's arguments, in order; optional: those that
+# may be left out; references: field -> table whose id it must name.
+Entity = namedtuple("Entity", ["table", "fields", "optional", "references", "create", "update", "delete"])
+
+ENTITIES = {
+    "user": Entity(
+        "user",
+        ("first_name", "last_name", "email", "password", "phone", "dob", "gender", "address", "role"),
+        ("phone", "dob", "address"), {},
+        create_user, update_user, delete_user,
+    ),
+    "artist": Entity(
+        "artist",
+        ("user_id", "name", "dob", "gender", "address", "first_release_year", "no_of_albums_released"),
+        ("dob", "address"), {"user_id": "user"},
+        create_artist, update_artist, delete_artist,
+    ),
+    "song": Entity(
+        "song",
+        ("artist_id", "title", "album_name", "genre"),
+        (), {"artist_id": "artist"},
+        create_song, update_song, delete_song,
+    ),
+}
+
+OPERATIONS = ("create", "update", "delete")
+
+
+class BatchError(Exception):
+    """
+    An operation was rejected; `index` is its position in the batch (None
+    for the batch as a whole). `conflict` is set when the operation was
+    well-formed but clashed with the data, e.g. a missing id.
+    """
+
+    def __init__(self, index, message, conflict=False):
+        super().__init__(message)
+        self.index = index
+        self.conflict = conflict
+
+
+def _check_ref(index, value, created, what, target_entity):
+    """
+    Validate an "$n" reference to an earlier create; `created` maps the
+    index of each create to its entity, which must be `target_entity`.
+    """
+    if isinstance(value, str) and value.startswith("$"):
+        try:
+            target = int(value[1:])
+        except ValueError:
+            raise BatchError(index, f"{what}: bad reference {value!r}")
+        if not 0 <= target < index or target not in created:
+            raise BatchError(index, f"{what}: {value} does not name an earlier create")
+        if created[target] != target_entity:
+            raise BatchError(index, f"{what}: {value} names a {created[target]} create, expected {target_entity}")
+    elif not isinstance(value, int) or isinstance(value, bool):
+        raise BatchError(index, f"{what} must be an integer or an \"$n\" reference")
+
+
+def _resolve(value, results):
+    if isinstance(value, str) and value.startswith("$"):
+        return results[int(value[1:])]["id"]
+    return value
+
+
+def validate_batch(operations, entities=None):
+    """
+    Check the shape of every operation before anything is written, and hash
+    new passwords (slow by design) so that no hashing happens while the
+    write transaction is open. `entities` limits which entities may be
+    touched. Returns the operations normalized; raises BatchError.
+    """
+    if not isinstance(operations, list) or not operations:
+        raise BatchError(None, "expected a non-empty list of operations")
+    if len(operations) > config.BATCH_MAX_OPERATIONS:
+        raise BatchError(None, f"at most {config.BATCH_MAX_OPERATIONS} operations per batch")
+    allowed = ENTITIES.keys() if entities is None else entities
+    created = {}
+    prepared = []
+    for index, operation in enumerate(operations):
+        if not isinstance(operation, dict):
+            raise BatchError(index, "operation must be an object")
+        op, name = operation.get("op"), operation.get("entity")
+        if op not in OPERATIONS:
+            raise BatchError(index, f"op must be one of {', '.join(OPERATIONS)}")
+        if name not in ENTITIES:
+            raise BatchError(index, f"entity must be one of {', '.join(ENTITIES)}")
+        if name not in allowed:
+            raise BatchError(index, f"not allowed to change {name} records")
+        entity = ENTITIES[name]
+        fields = operation.get("fields") or {}
+        if not isinstance(fields, dict):
+            raise BatchError(index, "fields must be an object")
+        unknown = [field for field in fields if field not in entity.fields]
+        if unknown:
+            raise BatchError(index, f"unknown field(s) for {name}: {', '.join(unknown)}")
+        if op == "create":
+            missing = [field for field in entity.fields
+                       if field not in entity.optional and fields.get(field) in (None, "")]
+            if missing:
+                raise BatchError(index, f"missing field(s): {', '.join(missing)}")
+            created[index] = name
+        else:
+            _check_ref(index, operation.get("id"), created, "id", name)
+            if op == "update" and not fields:
+                raise BatchError(index, "update needs at least one field")
+            if op == "delete" and fields:
+                raise BatchError(index, "delete takes no fields")
+        for field, table in entity.references.items():
+            if field in fields:
+                _check_ref(index, fields[field], created, field, table)
+        fields = dict(fields)
+        if "password" in fields:
+            fields["password"] = hash_password(str(fields["password"]))
+        prepared.append({"op": op, "entity": name, "id": operation.get("id"), "fields": fields})
+    return prepared
+
+
+def apply_batch(operations, entities=None):
+    """
+    Validate `operations` (see validate_batch) and apply them in order in
+    one transaction: either all of them take effect or none does.
+    Returns one {"op", "entity", "id"} result per operation; raises
+    BatchError, after rolling back, for the first one that fails.
+    """
+    prepared = validate_batch(operations, entities)
+    results = []
+    with transaction() as connection_obj:
+        if not connection_obj.in_transaction:
+            # Take the write lock up front so reference checks stay valid.
+            connection_obj.execute("BEGIN IMMEDIATE")
+        for index, operation in enumerate(prepared):
+            entity = ENTITIES[operation["entity"]]
+            fields = {field: _resolve(value, results) for field, value in operation["fields"].items()}
+            for field, table in entity.references.items():
+                if field in fields and not existing_ids(connection_obj, table, [fields[field]]):
+                    raise BatchError(index, f"{field} {fields[field]} does not exist", conflict=True)
+            try:
+                if operation["op"] == "create":
+                    values = [fields.get(field) for field in entity.fields]
+                    if entity.table == "user":
+                        # Already hashed by validate_batch.
+                        row_id = entity.create(*values, password_hash=fields["password"])
+                    else:
+                        row_id = entity.create(*values)
+                else:
+                    row_id = _resolve(operation["id"], results)
+                    if operation["op"] == "update":
+                        changed = entity.update(row_id, **fields)
+                    else:
+                        changed = entity.delete(row_id)
+                    if not changed:
+                        raise BatchError(index, f"{operation['entity']} {row_id} does not exist", conflict=True)
+            except sqlite3.Error as e:
+                raise BatchError(index, str(e), conflict=True)
+            results.append({"op": operation["op"], "entity": operation["entity"], "id": row_id})
+    return results
@@ -0,0 +1,55 @@
+# bench_hash.py
+"""
+Measure password hashing throughput with the configured parameters.
+
+    python bench_hash.py [seconds]
+
+Reports hashes per second on one core (inline) and through the hashing
+process pool, and the pool's throughput per worker process.
+"""
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+import security
+
+
+def _run_for(seconds, hash_one, concurrency):
+    """Call hash_one from `concurrency` threads for `seconds`; return hashes/s."""
+    deadline = time.perf_counter() + seconds
+
+    def worker():
+        done = 0
+        while time.perf_counter() < deadline:
+            hash_one()
+            done += 1
+        return done
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as threads:
+        total = sum(threads.map(lambda _: worker(), range(concurrency)))
+    return total / (time.perf_counter() - started)
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 3.0
+    iterations = config.HASH_ITERATIONS
+    salt = os.urandom(16)
+    print(f"PBKDF2-SHA256, {iterations} iterations, {seconds:.0f}s per run")
+
+    inline = _run_for(seconds, lambda: security._pbkdf2("benchmark", salt, iterations), 1)
+    print(f"inline, 1 thread:        {inline:8.1f} hashes/s")
+
+    workers = config.HASH_WORKERS
+    if workers > 0:
+        security.start_pool()
+        pooled = _run_for(seconds, lambda: security.hash_password("benchmark"), workers * 2)
+        print(f"pool, {workers} processes:    {pooled:8.1f} hashes/s "
+              f"({pooled / workers:.1f} hashes/s per core)")
+        security.shutdown_pool()
+
+
+if __name__ == "__main__":
+    main()
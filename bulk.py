@@ -0,0 +1,133 @@
+# bulk.py
+"""
+Building blocks for the bulk import and export paths (artist_crud,
+music_crud): row readers for CSV and NDJSON input, batched validation and
+insertion, and streaming CSV / NDJSON writers over a cursor.
+"""
+import csv
+import io
+import json
+import time
+
+from db_pool import transaction
+
+
+def csv_rows(content, required):
+    """
+    Return an iterator of (line_no, row dict) over CSV `content`.
+    Raises ValueError straight away if the header lacks a `required` column.
+    """
+    reader = csv.DictReader(io.StringIO(content))
+    missing = [col for col in required if col not in (reader.fieldnames or [])]
+    if missing:
+        raise ValueError(f"CSV is missing column(s): {', '.join(missing)}")
+
+    def rows():
+        for row in reader:
+            yield reader.line_num, row
+    return rows()
+
+
+def ndjson_rows(content, rejected):
+    """
+    Yield (line_no, row dict) for each JSON object line of `content`, with
+    values as strings like the CSV reader's ("" for null). Lines that are
+    not JSON objects go to `rejected`; blank lines are skipped.
+    """
+    for line_no, line in enumerate(content.splitlines(), 1):
+        if not line.strip():
+            continue
+        try:
+            obj = json.loads(line)
+        except ValueError as e:
+            rejected.append((line_no, f"invalid JSON: {e}"))
+            continue
+        if not isinstance(obj, dict):
+            rejected.append((line_no, "expected a JSON object"))
+            continue
+        yield line_no, {key: "" if value is None else str(value) for key, value in obj.items()}
+
+
+def existing_ids(conn, table, ids):
+    """The subset of `ids` that are ids of rows in `table`, with one query."""
+    ids = sorted(set(ids))
+    if not ids:
+        return set()
+    placeholders = ",".join("?" * len(ids))
+    return {row[0] for row in conn.execute(f"SELECT id FROM {table} WHERE id IN ({placeholders})", ids)}
+
+
+def batched_import(rows, validate, insert_batch, batch_size=500, commit_per_batch=False, rejected=None):
+    """
+    Validate (line_no, row) pairs with validate(row) -> (values, reason) and
+    insert the valid ones with insert_batch(conn, [(line_no, values)], rejected),
+    which returns how many rows it inserted, `batch_size` rows at a time.
+    Runs in one transaction unless commit_per_batch is True.
+    Returns {"inserted": int, "rejected": [(line_no, reason), ...], "elapsed": seconds}.
+    """
+    started = time.perf_counter()
+    rejected = [] if rejected is None else rejected
+    inserted = 0
+
+    def batches():
+        batch = []
+        for line_no, row in rows:
+            values, reason = validate(row)
+            if reason:
+                rejected.append((line_no, reason))
+                continue
+            batch.append((line_no, values))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    if commit_per_batch:
+        for batch in batches():
+            with transaction() as conn:
+                inserted += insert_batch(conn, batch, rejected)
+    else:
+        with transaction() as conn:
+            for batch in batches():
+                inserted += insert_batch(conn, batch, rejected)
+
+    rejected.sort()
+    return {"inserted": inserted, "rejected": rejected, "elapsed": time.perf_counter() - started}
+
+
+def iter_csv(cursor, header, batch_size=500):
+    """
+    Yield the header and then the rows of an executed `cursor` as CSV text,
+    one chunk per `batch_size` rows. Closes the cursor when done, or when
+    the consumer stops early (client went away).
+    """
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(header)
+    yield output.getvalue()
+    try:
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            output.seek(0)
+            output.truncate()
+            writer.writerows(rows)
+            yield output.getvalue()
+    finally:
+        cursor.close()
+
+
+def iter_ndjson(cursor, fields, batch_size=500):
+    """Like iter_csv, but one compact JSON object per row, keyed by `fields`."""
+    try:
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield "".join(
+                json.dumps(dict(zip(fields, row)), separators=(",", ":"), ensure_ascii=False) + "\n"
+                for row in rows)
+    finally:
+        cursor.close()
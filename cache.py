@@ -0,0 +1,137 @@
+# cache.py
+import functools
+import threading
+import time
+from collections import OrderedDict
+
+import config
+from db_pool import call_after_transaction, data_version_changed
+
+# Every cache created here, by name, for cache_stats().
+CACHES = {}
+
+_MISSING = object()
+
+
+class LRUCache:
+    """
+    Thread-safe LRU cache with a size limit and a per-entry TTL.
+    The TTL bounds how long an entry can be stale if an invalidation races
+    with a concurrent read on another thread.
+    """
+
+    def __init__(self, name, maxsize=1024, ttl=60, clock=time.monotonic):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        CACHES[name] = self
+
+    def get(self, key, default=_MISSING):
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+def _key(entity_id):
+    # Ids arrive as ints from the database and as strings from forms.
+    try:
+        return int(entity_id)
+    except (TypeError, ValueError):
+        return entity_id
+
+
+def cached_by_id(cache):
+    """Decorator for get_*_by_id(entity_id) lookups; caches misses (None) too."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(entity_id):
+            if config.CACHE_CROSS_PROCESS and data_version_changed():
+                # Another process may have written; our invalidations
+                # never reached this process, so start over.
+                clear_all()
+            key = _key(entity_id)
+            row = cache.get(key)
+            if row is _MISSING:
+                row = func(entity_id)
+                cache.set(key, row)
+            return row
+        wrapper.cache = cache
+        return wrapper
+    return decorator
+
+
+def invalidate_id(cache, entity_id):
+    """
+    Drop entity_id from the cache now and again when the surrounding
+    transaction ends, so a read that raced the uncommitted write (or a
+    rollback) cannot leave a stale row behind.
+    """
+    key = _key(entity_id)
+    cache.invalidate(key)
+    call_after_transaction(lambda: cache.invalidate(key))
+
+
+def invalidate_ids(cache, entity_ids):
+    """invalidate_id for many ids, with a single after-transaction callback."""
+    keys = [_key(entity_id) for entity_id in entity_ids]
+    for key in keys:
+        cache.invalidate(key)
+
+    def invalidate_all():
+        for key in keys:
+            cache.invalidate(key)
+    call_after_transaction(invalidate_all)
+
+
+def clear_all():
+    for cache in CACHES.values():
+        cache.clear()
+
+
+def cache_stats():
+    return {name: cache.stats() for name, cache in CACHES.items()}
+
+
+user_cache = LRUCache("user", maxsize=config.CACHE_SIZE, ttl=config.CACHE_TTL)
+artist_cache = LRUCache("artist", maxsize=config.CACHE_SIZE, ttl=config.CACHE_TTL)
+song_cache = LRUCache("song", maxsize=config.CACHE_SIZE, ttl=config.CACHE_TTL)
@@ -0,0 +1,139 @@
+# check_query_plans.py
+"""
+Run every query issued by the CRUD modules through EXPLAIN QUERY PLAN and
+fail if any of them scans a whole table.
+
+    python check_query_plans.py
+
+Works on a throwaway database, so it is safe to run anywhere.
+"""
+import os
+import sys
+import tempfile
+
+import config
+import db_pool
+from cache import CACHES
+from database import create_tables
+import user_crud
+import artist_crud
+import music_crud
+import stats
+
+# Queries that read the whole table by design.
+ALLOWED_SCANS = {
+    "artist_crud.export_artists_csv",
+    "music_crud.iter_songs_export",
+}
+
+
+def _seed():
+    user_id = user_crud.create_user("Ada", "L", "ada@example.com", "pw", 1, "1990-01-01", "f", "x", "artist")
+    artist_id = artist_crud.create_artist(user_id, "Ada", "1990-01-01", "f", "x", 2010, 1)
+    song_id = music_crud.create_song(artist_id, "Song", "Album", "rock")
+    return user_id, artist_id, song_id
+
+
+def _calls(user_id, artist_id, song_id):
+    """(name, callable) for every CRUD and stats read function, writes last."""
+    return [
+        ("user_crud.get_user_by_id", lambda: user_crud.get_user_by_id(user_id)),
+        ("user_crud.list_users_paginated", lambda: user_crud.list_users_paginated(limit=1)),
+        ("user_crud.list_users_paginated", lambda: user_crud.list_users_paginated(after=1, limit=1)),
+        ("user_crud.list_users_paginated", lambda: user_crud.list_users_paginated(before=2, limit=1)),
+        ("user_crud.login", lambda: user_crud.login("ada@example.com", "wrong")),
+        ("artist_crud.get_artist_by_id", lambda: artist_crud.get_artist_by_id(artist_id)),
+        ("artist_crud.get_user_by_id", lambda: artist_crud.get_user_by_id(user_id)),
+        ("artist_crud.list_artists_paginated", lambda: artist_crud.list_artists_paginated(limit=1)),
+        ("artist_crud.list_artists_paginated", lambda: artist_crud.list_artists_paginated(after=1, limit=1)),
+        ("artist_crud.list_artists_paginated", lambda: artist_crud.list_artists_paginated(before=2, limit=1)),
+        ("artist_crud.list_songs_for_artist", lambda: artist_crud.list_songs_for_artist(artist_id)),
+        ("artist_crud.search_artists", lambda: artist_crud.search_artists("ad")),
+        ("artist_crud.export_artists_csv", artist_crud.export_artists_csv),
+        ("artist_crud.login", lambda: artist_crud.login("ada@example.com", "wrong")),
+        ("music_crud.get_song_by_id", lambda: music_crud.get_song_by_id(song_id)),
+        ("music_crud.list_songs_paginated", lambda: music_crud.list_songs_paginated(limit=1)),
+        ("music_crud.list_songs_paginated", lambda: music_crud.list_songs_paginated(after=1, limit=1)),
+        ("music_crud.list_songs_paginated", lambda: music_crud.list_songs_paginated(before=2, limit=1)),
+        ("music_crud.list_songs_for_user", lambda: music_crud.list_songs_for_user(user_id)),
+        ("music_crud.search_songs", lambda: music_crud.search_songs("song alb")),
+        ("music_crud.iter_songs_export", lambda: list(music_crud.iter_songs_export())),
+        ("stats.get_stat", lambda: stats.get_stat("songs_by_artist", artist_id)),
+        ("stats.top_stats", lambda: stats.top_stats("songs_by_genre")),
+        ("music_crud.import_songs", lambda: music_crud.import_songs(
+            f"artist_id,title,album_name,genre\n{artist_id},Bulk,Album,rock\n")),
+        ("music_crud.update_song", lambda: music_crud.update_song(song_id, title="New")),
+        ("music_crud.update_many_songs", lambda: music_crud.update_many_songs([song_id], genre="pop")),
+        ("artist_crud.update_artist", lambda: artist_crud.update_artist(artist_id, name="New")),
+        ("artist_crud.update_many_artists", lambda: artist_crud.update_many_artists([artist_id], gender="m")),
+        ("user_crud.update_user", lambda: user_crud.update_user(user_id, first_name="New")),
+        ("user_crud.update_many_users", lambda: user_crud.update_many_users([user_id], role="artist")),
+        ("music_crud.delete_song", lambda: music_crud.delete_song(song_id)),
+        ("artist_crud.delete_artist", lambda: artist_crud.delete_artist(artist_id)),
+        ("user_crud.delete_user", lambda: user_crud.delete_user(user_id)),
+    ]
+
+
+def _full_scans(connection_obj, sql):
+    """Return the plan lines of `sql` that scan a table without an index."""
+    plan = connection_obj.execute("EXPLAIN QUERY PLAN " + sql).fetchall()
+    scans = []
+    for row in plan:
+        detail = row[-1]
+        if detail.startswith("SCAN ") and " USING " not in detail:
+            # A virtual table (FTS) with a non-empty index string is
+            # answered from its own index, e.g. "INDEX 0:M1" for a MATCH.
+            if " VIRTUAL TABLE INDEX " in detail and not detail.endswith(":"):
+                continue
+            # json_each walks a bound JSON array (update_many_*), not a table.
+            if detail.startswith("SCAN json_each "):
+                continue
+            scans.append(detail)
+    return scans
+
+
+def check_query_plans():
+    """Return a list of (function, sql, plan detail) for every full scan found."""
+    connection_obj = db_pool.get_connection()
+    create_tables()
+    ids = _seed()
+
+    statements = []
+    connection_obj.set_trace_callback(statements.append)
+    failures = []
+    try:
+        for name, call in _calls(*ids):
+            del statements[:]
+            # Start cold so cached lookups still reach SQLite.
+            for cache in CACHES.values():
+                cache.clear()
+            call()
+            for sql in list(statements):
+                if not sql.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE", "INSERT")):
+                    continue
+                if name in ALLOWED_SCANS:
+                    continue
+                for detail in _full_scans(connection_obj, sql):
+                    failures.append((name, " ".join(sql.split()), detail))
+    finally:
+        connection_obj.set_trace_callback(None)
+    return failures
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        config.DB_PATH = os.path.join(tmp, "plans.db")
+        try:
+            failures = check_query_plans()
+        finally:
+            db_pool.close_connection()
+    for name, sql, detail in failures:
+        print(f"FULL SCAN in {name}: {detail}\n    {sql}")
+    if failures:
+        return 1
+    print("OK: no unexpected full table scans")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,45 @@
+# compression.py
+import zlib
+
+# Content-Encoding name -> zlib wbits (31: gzip container, 15: zlib "deflate").
+ENCODINGS = {"gzip": 31, "deflate": 15}
+# Preferred order when the client accepts several with the same q-value.
+PREFERENCE = ("gzip", "deflate")
+
+
+def negotiate(accept_encoding):
+    """
+    Pick a Content-Encoding from an Accept-Encoding header value, or None
+    to send the body as is. Honours q-values, including q=0 and "*".
+    """
+    if not accept_encoding:
+        return None
+    weights = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[name] = q
+    best, best_q = None, 0.0
+    for name in PREFERENCE:
+        q = weights.get(name, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+def compress(data, encoding, level=6):
+    compressor = compressobj(encoding, level)
+    return compressor.compress(data) + compressor.flush()
+
+
+def compressobj(encoding, level=6):
+    """A streaming compressor for encoding: call .compress(chunk) then .flush()."""
+    return zlib.compressobj(level, zlib.DEFLATED, ENCODINGS[encoding])
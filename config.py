@@ -0,0 +1,59 @@
+# config.py
+import os
+
+# Path of the SQLite database file used by every CRUD module.
+DB_PATH = os.environ.get("AMS_DB_PATH", "ams.db")
+
+# Name of the SQLite pragma profile applied to every connection
+# (see db_pool.PRAGMA_PROFILES).
+PRAGMA_PROFILE = os.environ.get("AMS_PRAGMA_PROFILE", "durable")
+
+# Session lifetime (seconds) and the cap on concurrently stored sessions.
+SESSION_IDLE_TTL = int(os.environ.get("AMS_SESSION_IDLE_TTL", 30 * 60))
+SESSION_ABSOLUTE_TTL = int(os.environ.get("AMS_SESSION_ABSOLUTE_TTL", 12 * 60 * 60))
+SESSION_MAX = int(os.environ.get("AMS_SESSION_MAX", 10000))
+
+# Entity read cache (get_*_by_id): entries per table and TTL in seconds.
+CACHE_SIZE = int(os.environ.get("AMS_CACHE_SIZE", 4096))
+CACHE_TTL = float(os.environ.get("AMS_CACHE_TTL", 60))
+
+# PBKDF2 iterations for new password hashes; logins rehash older values.
+HASH_ITERATIONS = int(os.environ.get("AMS_HASH_ITERATIONS", 100_000))
+# Processes in the password-hashing pool (0 hashes on the request thread).
+HASH_WORKERS = int(os.environ.get("AMS_HASH_WORKERS", os.cpu_count() or 1))
+
+# Login admission control: token buckets per client address and per email
+# (sustained attempts per second, burst size) and the cap on password
+# verifications running at once.
+LOGIN_RATE_PER_CLIENT = float(os.environ.get("AMS_LOGIN_RATE_PER_CLIENT", 1.0))
+LOGIN_BURST_PER_CLIENT = int(os.environ.get("AMS_LOGIN_BURST_PER_CLIENT", 10))
+LOGIN_RATE_PER_EMAIL = float(os.environ.get("AMS_LOGIN_RATE_PER_EMAIL", 0.2))
+LOGIN_BURST_PER_EMAIL = int(os.environ.get("AMS_LOGIN_BURST_PER_EMAIL", 5))
+LOGIN_MAX_INFLIGHT = int(os.environ.get("AMS_LOGIN_MAX_INFLIGHT", 2 * max(1, HASH_WORKERS)))
+# Use the first X-Forwarded-For address as the client (only behind a trusted proxy).
+TRUST_FORWARDED_FOR = os.environ.get("AMS_TRUST_FORWARDED_FOR", "") == "1"
+
+# Where sessions live: "memory" (this process) or "sqlite" (shared by all
+# processes; used automatically when run_server pre-forks workers).
+SESSION_BACKEND = os.environ.get("AMS_SESSION_BACKEND", "memory")
+# Set when several processes write the database, so the entity caches
+# check SQLite's data_version before serving a cached row.
+CACHE_CROSS_PROCESS = False
+
+# "server": random session ids looked up in SESSIONS.
+# "signed": stateless HMAC-signed tokens (see tokens.py); needs SESSION_KEYS,
+# given as "kid:secret[,kid:secret...]" with the signing key first.
+SESSION_MODE = os.environ.get("AMS_SESSION_MODE", "server")
+SESSION_KEYS = os.environ.get("AMS_SESSION_KEYS", "")
+SESSION_TOKEN_TTL = int(os.environ.get("AMS_SESSION_TOKEN_TTL", 60 * 60))
+
+# HTTP/1.1 keep-alive: idle timeout (seconds) and requests per connection.
+KEEPALIVE_TIMEOUT = float(os.environ.get("AMS_KEEPALIVE_TIMEOUT", 5))
+KEEPALIVE_MAX_REQUESTS = int(os.environ.get("AMS_KEEPALIVE_MAX_REQUESTS", 100))
+
+# Response compression: bodies smaller than this many bytes go out as is.
+COMPRESSION_MIN_SIZE = int(os.environ.get("AMS_COMPRESSION_MIN_SIZE", 1024))
+COMPRESSION_LEVEL = int(os.environ.get("AMS_COMPRESSION_LEVEL", 6))
+
+# Most operations accepted in one POST /api/batch request.
+BATCH_MAX_OPERATIONS = int(os.environ.get("AMS_BATCH_MAX_OPERATIONS", 5000))
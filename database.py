@@ -1,10 +1,32 @@
-import sqlite3
+from db_pool import get_connection, transaction
 
+# Tables whose changes are counted in table_version.
+VERSIONED_TABLES = ("user", "artist", "song")
+
+# Full-text indexed columns per table; the index is the `<table>_fts` table.
+FTS_TABLES = {
+    "song": ("title", "album_name", "genre"),
+    "artist": ("name",),
+}
+
+# Counters kept in catalog_stat, by kind: (table, column grouped by). With
+# no column the kind has a single row, key '', holding the table's row count.
+CATALOG_STATS = {
+    "songs": ("song", None),
+    "songs_by_artist": ("song", "artist_id"),
+    "songs_by_genre": ("song", "genre"),
+    "artists": ("artist", None),
+    "artists_by_user": ("artist", "user_id"),
+}
 
-connection_obj = sqlite3.connect("ams.db")
 
 def create_tables():
 
+    with transaction() as connection_obj:
+        _create_tables(connection_obj)
+
+def _create_tables(connection_obj):
+
     cursor_obj = connection_obj.cursor()
 
     # create user table
@@ -56,6 +78,179 @@ def create_tables():
     );
     """)
 
-    connection_obj.commit()
-    connection_obj.close()
-    
\ No newline at end of file
+    # Secondary indexes for the lookup and join paths:
+    #   song.artist_id  -> list_songs_for_artist, list_songs_for_user
+    #   artist.user_id  -> list_songs_for_user
+    # user.email is already indexed through its UNIQUE constraint.
+    cursor_obj.execute("CREATE INDEX IF NOT EXISTS idx_song_artist_id ON song(artist_id)")
+    cursor_obj.execute("CREATE INDEX IF NOT EXISTS idx_artist_user_id ON artist(user_id)")
+
+    # Server-side sessions shared by all worker processes (pre-fork mode).
+    cursor_obj.execute("""
+    CREATE TABLE IF NOT EXISTS session (
+        id TEXT PRIMARY KEY,
+        user_id INTEGER NOT NULL,
+        role TEXT NOT NULL,
+        created_at REAL NOT NULL,
+        last_seen REAL NOT NULL
+    );
+    """)
+    cursor_obj.execute("CREATE INDEX IF NOT EXISTS idx_session_last_seen ON session(last_seen)")
+    cursor_obj.execute("CREATE INDEX IF NOT EXISTS idx_session_user_id ON session(user_id)")
+
+    # Revoked signed session tokens (tokens.RevocationList). A row revokes
+    # either one token (jti) or every token of a user issued before revoked_at.
+    cursor_obj.execute("""
+    CREATE TABLE IF NOT EXISTS token_revocation (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        jti TEXT,
+        user_id INTEGER,
+        revoked_at REAL NOT NULL,
+        expires_at REAL NOT NULL
+    );
+    """)
+    cursor_obj.execute("CREATE INDEX IF NOT EXISTS idx_token_revocation_expires_at ON token_revocation(expires_at)")
+
+    # A change counter per data table, bumped by triggers on every write, so
+    # readers can tell whether anything changed without touching the table.
+    cursor_obj.execute("""
+    CREATE TABLE IF NOT EXISTS table_version (
+        name TEXT PRIMARY KEY,
+        version INTEGER NOT NULL
+    );
+    """)
+    for table in VERSIONED_TABLES:
+        cursor_obj.execute("INSERT OR IGNORE INTO table_version (name, version) VALUES (?, 0)", (table,))
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            cursor_obj.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_{event.lower()}_version
+            AFTER {event} ON {table}
+            BEGIN
+                UPDATE table_version SET version = version + 1 WHERE name = '{table}';
+            END;
+            """)
+
+    # Full-text indexes (external content: the text lives only in the data
+    # tables) kept in step by triggers. A newly created index is filled
+    # from the existing rows.
+    for table, columns in FTS_TABLES.items():
+        _create_fts_index(cursor_obj, table, columns)
+
+    # Catalog statistics (see stats.py), kept current by triggers so that
+    # reading a count is a primary key lookup instead of a GROUP BY scan.
+    exists = cursor_obj.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'catalog_stat'").fetchone()
+    cursor_obj.execute("""
+    CREATE TABLE IF NOT EXISTS catalog_stat (
+        kind TEXT NOT NULL,
+        key NOT NULL,
+        count INTEGER NOT NULL,
+        PRIMARY KEY (kind, key)
+    ) WITHOUT ROWID;
+    """)
+    for table in sorted({table for table, _ in CATALOG_STATS.values()}):
+        _create_catalog_stat_triggers(cursor_obj, table)
+    if not exists:
+        rebuild_catalog_stats(cursor_obj)
+
+def _create_fts_index(cursor_obj, table, columns):
+    fts = f"{table}_fts"
+    exists = cursor_obj.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (fts,)).fetchone()
+    column_list = ", ".join(columns)
+    new_values = ", ".join(f"new.{column}" for column in columns)
+    old_values = ", ".join(f"old.{column}" for column in columns)
+    cursor_obj.execute(f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+        {column_list},
+        content='{table}', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    );
+    """)
+    cursor_obj.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS trg_{fts}_insert AFTER INSERT ON {table}
+    BEGIN
+        INSERT INTO {fts} (rowid, {column_list}) VALUES (new.id, {new_values});
+    END;
+    """)
+    cursor_obj.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS trg_{fts}_delete AFTER DELETE ON {table}
+    BEGIN
+        INSERT INTO {fts} ({fts}, rowid, {column_list}) VALUES ('delete', old.id, {old_values});
+    END;
+    """)
+    # Only edits to indexed columns touch the index.
+    cursor_obj.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS trg_{fts}_update AFTER UPDATE OF {column_list} ON {table}
+    BEGIN
+        INSERT INTO {fts} ({fts}, rowid, {column_list}) VALUES ('delete', old.id, {old_values});
+        INSERT INTO {fts} (rowid, {column_list}) VALUES (new.id, {new_values});
+    END;
+    """)
+    if not exists:
+        cursor_obj.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+
+def _create_catalog_stat_triggers(cursor_obj, table):
+    kinds = [(kind, column) for kind, (stat_table, column) in CATALOG_STATS.items() if stat_table == table]
+
+    def key(row, column):
+        return f"{row}.{column}" if column else "''"
+
+    def increment(kind, column):
+        return (f"INSERT INTO catalog_stat (kind, key, count) VALUES ('{kind}', {key('new', column)}, 1) "
+                f"ON CONFLICT (kind, key) DO UPDATE SET count = count + 1;")
+
+    def decrement(kind, column):
+        where = f"kind = '{kind}' AND key = {key('old', column)}"
+        return (f"UPDATE catalog_stat SET count = count - 1 WHERE {where}; "
+                f"DELETE FROM catalog_stat WHERE {where} AND count <= 0;")
+
+    cursor_obj.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS trg_{table}_insert_stat AFTER INSERT ON {table}
+    BEGIN
+        {" ".join(increment(kind, column) for kind, column in kinds)}
+    END;
+    """)
+    cursor_obj.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS trg_{table}_delete_stat AFTER DELETE ON {table}
+    BEGIN
+        {" ".join(decrement(kind, column) for kind, column in kinds)}
+    END;
+    """)
+    grouped = [(kind, column) for kind, column in kinds if column]
+    columns = ", ".join(sorted({column for _, column in grouped}))
+    cursor_obj.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS trg_{table}_update_stat AFTER UPDATE OF {columns} ON {table}
+    BEGIN
+        {" ".join(decrement(kind, column) + " " + increment(kind, column) for kind, column in grouped)}
+    END;
+    """)
+
+def count_catalog_stats(connection_obj):
+    """Recount every catalog statistic from the data tables: {(kind, key): count}."""
+    counts = {}
+    for kind, (table, column) in CATALOG_STATS.items():
+        if column:
+            rows = connection_obj.execute(f"SELECT {column}, COUNT(*) FROM {table} GROUP BY {column}").fetchall()
+        else:
+            rows = connection_obj.execute(f"SELECT '', COUNT(*) FROM {table}").fetchall()
+        for key, count in rows:
+            if count:
+                counts[(kind, key)] = count
+    return counts
+
+def rebuild_catalog_stats(connection_obj):
+    """Replace the contents of catalog_stat with a fresh count; call inside a transaction."""
+    counts = count_catalog_stats(connection_obj)
+    connection_obj.execute("DELETE FROM catalog_stat")
+    connection_obj.executemany(
+        "INSERT INTO catalog_stat (kind, key, count) VALUES (?, ?, ?)",
+        [(kind, key, count) for (kind, key), count in counts.items()])
+    return counts
+
+def table_versions(tables):
+    """Return {table: change version} for the given data tables."""
+    placeholders = ",".join("?" * len(tables))
+    rows = get_connection().execute(
+        f"SELECT name, version FROM table_version WHERE name IN ({placeholders})", tuple(tables)).fetchall()
+    return dict(rows)
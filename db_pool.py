@@ -0,0 +1,141 @@
+# db_pool.py
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+import config
+
+# Pragmas applied to every new connection, selected by config.PRAGMA_PROFILE.
+# Both profiles use WAL so readers never block behind a writer; they differ
+# in how hard each commit is pushed to disk.
+#   durable: fsync on every commit (synchronous=FULL).
+#   fast:    fsync only at WAL checkpoints (synchronous=NORMAL). A power loss
+#            can drop the last few commits but never corrupts the database.
+PRAGMA_PROFILES = {
+    "durable": (
+        ("journal_mode", "WAL"),
+        ("synchronous", "FULL"),
+        ("cache_size", -16000),       # KiB when negative, i.e. ~16 MB
+        ("mmap_size", 0),
+        ("temp_store", "DEFAULT"),
+        ("busy_timeout", 5000),       # ms
+    ),
+    "fast": (
+        ("journal_mode", "WAL"),
+        ("synchronous", "NORMAL"),
+        ("cache_size", -64000),
+        ("mmap_size", 268435456),     # 256 MB
+        ("temp_store", "MEMORY"),
+        ("busy_timeout", 5000),
+    ),
+}
+
+# One connection per thread, opened lazily and reused for every CRUD call
+# made on that thread.
+_local = threading.local()
+
+
+def get_connection():
+    """
+    Return this thread's SQLite connection, opening it on first use.
+    """
+    connection_obj = getattr(_local, "connection", None)
+    if connection_obj is None:
+        connection_obj = sqlite3.connect(config.DB_PATH)
+        apply_pragmas(connection_obj)
+        _local.connection = connection_obj
+        _local.depth = 0
+        _local.pending = []
+        _local.data_version = None
+    return connection_obj
+
+
+def get_pragma_profile(name=None):
+    """Return the (pragma, value) pairs for the named (or configured) profile."""
+    name = name or config.PRAGMA_PROFILE
+    if name not in PRAGMA_PROFILES:
+        raise ValueError(f"Unknown pragma profile {name!r}, expected one of {sorted(PRAGMA_PROFILES)}")
+    return PRAGMA_PROFILES[name]
+
+
+def apply_pragmas(connection_obj, name=None):
+    for pragma, value in get_pragma_profile(name):
+        connection_obj.execute(f"PRAGMA {pragma} = {value}")
+
+
+def describe_pragmas(name=None):
+    """
+    Human-readable summary of the active profile, read back from SQLite so
+    it reflects what was actually applied (e.g. WAL on a read-only filesystem).
+    """
+    name = name or config.PRAGMA_PROFILE
+    connection_obj = get_connection()
+    settings = []
+    for pragma, _ in get_pragma_profile(name):
+        value = connection_obj.execute(f"PRAGMA {pragma}").fetchone()[0]
+        settings.append(f"{pragma}={value}")
+    return f"{name} ({', '.join(settings)})"
+
+
+def close_connection():
+    """Close this thread's connection (if any); the next call reopens it."""
+    connection_obj = getattr(_local, "connection", None)
+    if connection_obj is not None:
+        connection_obj.close()
+        _local.connection = None
+        _local.depth = 0
+        _local.pending = []
+
+
+@contextmanager
+def transaction():
+    """
+    Run a block of writes as one transaction. For example:
+      with transaction():
+          artist_id = create_artist(...)
+          create_song(artist_id, ...)
+    Commits when the outermost block exits normally and rolls back if it
+    raises. CRUD functions use this internally, so calling them inside an
+    explicit transaction() folds their writes into the enclosing one.
+    """
+    connection_obj = get_connection()
+    depth = _local.depth
+    _local.depth = depth + 1
+    try:
+        yield connection_obj
+        if depth == 0:
+            connection_obj.commit()
+    except BaseException:
+        if depth == 0:
+            connection_obj.rollback()
+        raise
+    finally:
+        _local.depth = depth
+        if depth == 0:
+            callbacks, _local.pending = _local.pending, []
+            for callback in callbacks:
+                callback()
+
+
+def call_after_transaction(callback):
+    """
+    Run callback once this thread's outermost transaction() finishes
+    (committed or rolled back), or right away if none is open.
+    """
+    get_connection()
+    if _local.depth == 0:
+        callback()
+    else:
+        _local.pending.append(callback)
+
+
+def data_version_changed():
+    """
+    True if another connection (thread or process) has committed to the
+    database since this thread last asked. Costs one PRAGMA, no table access.
+    """
+    connection_obj = get_connection()
+    version = connection_obj.execute("PRAGMA data_version").fetchone()[0]
+    changed = version != _local.data_version
+    _local.data_version = version
+    return changed
@@ -1,5 +1,8 @@
 # music_crud.py
-import sqlite3
+from db_pool import get_connection, transaction, call_after_transaction
+from cache import cached_by_id, invalidate_id, invalidate_ids, song_cache
+from queries import projection, build_update, fts_match_query
+from bulk import csv_rows, ndjson_rows, batched_import, existing_ids, iter_csv, iter_ndjson
 
 # def list_songs_for_user(user_id):
 #     """
@@ -22,23 +25,31 @@ import sqlite3
 #     return rows
 
 # music_crud.py
+import json
 from datetime import datetime
 
+# Columns a caller may read; get_song_by_id returns these.
+SONG_FIELDS = ("id", "artist_id", "title", "album_name", "genre")
+# Default columns for song listings.
+SONG_LIST_FIELDS = ("id", "artist_id", "album_name", "genre")
+# Columns update_song may set.
+SONG_UPDATE_FIELDS = ("artist_id", "title", "album_name", "genre")
+
 def create_song(artist_id, title, album_name, genre):
-    connection_obj = sqlite3.connect("ams.db")
-    cursor_obj = connection_obj.cursor()
     now = datetime.now()
-    cursor_obj.execute("""
-        INSERT INTO song (artist_id, title, album_name, genre, created_at, updated_at)
-        VALUES (?, ?, ?, ?, ?,?)
-    """, (artist_id, title, album_name, genre, now, now))
-    connection_obj.commit()
-    music_id = cursor_obj.lastrowid
-    connection_obj.close()
+    with transaction() as connection_obj:
+        cursor_obj = connection_obj.cursor()
+        cursor_obj.execute("""
+            INSERT INTO song (artist_id, title, album_name, genre, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?,?)
+        """, (artist_id, title, album_name, genre, now, now))
+        music_id = cursor_obj.lastrowid
+        invalidate_id(song_cache, music_id)
     return music_id
 
+@cached_by_id(song_cache)
 def get_song_by_id(music_id):
-    connection_obj = sqlite3.connect("ams.db")
+    connection_obj = get_connection()
     cursor_obj = connection_obj.cursor()
     cursor_obj.execute("""
         SELECT id, artist_id, title, album_name, genre
@@ -46,56 +57,103 @@ def get_song_by_id(music_id):
         WHERE id = ?
     """, (music_id,))
     row = cursor_obj.fetchone()
-    connection_obj.close()
     return row
 
 def update_song(music_id, **kwargs):
-    connection_obj = sqlite3.connect("ams.db")
-    cursor_obj = connection_obj.cursor()
-    set_clauses = []
-    values = []
-    for field, value in kwargs.items():
-        set_clauses.append(f"{field} = ?")
-        values.append(value)
-    if not set_clauses:
-        connection_obj.close()
-        return
-    set_clauses.append("updated_at = ?")
-    now = datetime.now()
-    values.append(now)
-    set_str = ", ".join(set_clauses)
-    sql = f"UPDATE song SET {set_str} WHERE id = ?"
-    values.append(music_id)
-    cursor_obj.execute(sql, tuple(values))
-    connection_obj.commit()
-    connection_obj.close()
+    """
+    Update fields in the song record. For example:
+      update_song(3, genre="jazz")
+    Only SONG_UPDATE_FIELDS may be set (ValueError otherwise).
+    Returns the number of rows updated (0 when no song has that id).
+    """
+    if not kwargs:
+        return 0
+    sql, values = build_update("song", SONG_UPDATE_FIELDS, kwargs)
+    values += [datetime.now(), music_id]
+    with transaction() as connection_obj:
+        cursor_obj = connection_obj.execute(sql, values)
+        invalidate_id(song_cache, music_id)
+    return cursor_obj.rowcount
+
+def update_many_songs(ids, **kwargs):
+    """
+    Set the same fields on every song in `ids` with one UPDATE statement,
+    e.g. update_many_songs([4, 5, 6], genre="jazz")
+    Returns the number of rows updated.
+    """
+    ids = [int(row_id) for row_id in ids]
+    if not kwargs or not ids:
+        return 0
+    sql, values = build_update("song", SONG_UPDATE_FIELDS, kwargs, many=True)
+    values += [datetime.now(), json.dumps(ids)]
+    with transaction() as connection_obj:
+        cursor_obj = connection_obj.execute(sql, values)
+        invalidate_ids(song_cache, ids)
+    return cursor_obj.rowcount
 
 def delete_song(music_id):
-    connection_obj = sqlite3.connect("ams.db")
+    with transaction() as connection_obj:
+        cursor_obj = connection_obj.execute("DELETE FROM song WHERE id = ?", (music_id,))
+        invalidate_id(song_cache, music_id)
+    return cursor_obj.rowcount
+
+def list_songs_paginated(after=None, before=None, limit=10, fields=None):
+    """
+    Return one page of songs ordered by id, using the id as a cursor
+    (see user_crud.list_users_paginated). fields: tuple of SONG_FIELDS,
+    default SONG_LIST_FIELDS.
+    """
+    _, columns = projection(fields or SONG_LIST_FIELDS, SONG_FIELDS, "m.")
+    connection_obj = get_connection()
     cursor_obj = connection_obj.cursor()
-    cursor_obj.execute("DELETE FROM song WHERE id = ?", (music_id,))
-    connection_obj.commit()
-    connection_obj.close()
+    if before is not None:
+        cursor_obj.execute(f"""
+            SELECT {columns}
+            FROM song AS m
+            WHERE m.id < ?
+            ORDER BY m.id DESC
+            LIMIT ?
+        """, (before, limit))
+        rows = cursor_obj.fetchall()
+        rows.reverse()
+    else:
+        cursor_obj.execute(f"""
+            SELECT {columns}
+            FROM song AS m
+            WHERE m.id > ?
+            ORDER BY m.id ASC
+            LIMIT ?
+        """, (after or 0, limit))
+        rows = cursor_obj.fetchall()
+    return rows
 
-def list_songs_paginated(page=1, limit=10):
-    offset = (page - 1) * limit
-    connection_obj = sqlite3.connect("ams.db")
+def search_songs(text, limit=20, offset=0):
+    """
+    Full-text search of song title, album name and genre, best matches
+    first (title weighs most). Each word matches as a prefix. Returns up to
+    `limit` rows of SONG_FIELDS, starting at `offset` in the ranking.
+    """
+    match = fts_match_query(text)
+    if match is None:
+        return []
+    connection_obj = get_connection()
     cursor_obj = connection_obj.cursor()
     cursor_obj.execute("""
-        SELECT m.id, m.artist_id, m.album_name, m.genre
-        FROM song AS m
-        ORDER BY m.id ASC
+        SELECT m.id, m.artist_id, m.title, m.album_name, m.genre
+        FROM song_fts
+        JOIN song AS m ON m.id = song_fts.rowid
+        WHERE song_fts MATCH ?
+        ORDER BY bm25(song_fts, 10.0, 5.0, 1.0), m.id
         LIMIT ? OFFSET ?
-    """, (limit, offset))
+    """, (match, limit, offset))
     rows = cursor_obj.fetchall()
-    connection_obj.close()
     return rows
 
 def list_songs_for_user(user_id):
     """
     Return songs for the given user, by joining user->artist->music.
     """
-    connection_obj = sqlite3.connect("ams.db")
+    connection_obj = get_connection()
     cursor_obj = connection_obj.cursor()
     query = """
         SELECT s.id, s.album_name, s.genre
@@ -105,5 +163,94 @@ def list_songs_for_user(user_id):
     """
     cursor_obj.execute(query, (user_id,))
     rows = cursor_obj.fetchall()
-    connection_obj.close()
     return rows
+
+# ------------------------
+# Bulk import / export
+# ------------------------
+
+# Columns an import row must provide (an 'id' column, as written by the
+# export, is ignored).
+SONG_IMPORT_REQUIRED = ("artist_id", "title", "album_name", "genre")
+SONG_IMPORT_FORMATS = ("csv", "ndjson")
+
+def iter_songs_export(format="csv", batch_size=500):
+    """
+    Yield the song table as CSV or NDJSON text (columns SONG_FIELDS), one
+    chunk per `batch_size` rows, so an export of any size streams in
+    bounded memory.
+    """
+    if format not in SONG_IMPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {format}")
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT id, artist_id, title, album_name, genre
+        FROM song
+        ORDER BY id ASC
+    """)
+    if format == "csv":
+        yield from iter_csv(cursor, SONG_FIELDS, batch_size)
+    else:
+        yield from iter_ndjson(cursor, SONG_FIELDS, batch_size)
+
+def _validate_song_row(row):
+    """
+    Check one parsed row. Returns ((artist_id, title, album_name, genre), None)
+    when the row is valid, or (None, reason) when it is not.
+    """
+    missing = [col for col in SONG_IMPORT_REQUIRED if not (row.get(col) or "").strip()]
+    if missing:
+        return None, f"missing value for {', '.join(missing)}"
+    try:
+        artist_id = int(row["artist_id"])
+    except ValueError:
+        return None, "artist_id must be an integer"
+    return (artist_id, row["title"].strip(), row["album_name"].strip(), row["genre"].strip()), None
+
+def _insert_song_batch(conn, batch, now, rejected):
+    """Insert validated (line_no, values) pairs whose artist_id exists; return the count."""
+    known = existing_ids(conn, "artist", [values[0] for _, values in batch])
+    params = []
+    for line_no, values in batch:
+        if values[0] in known:
+            params.append(values + (now, now))
+        else:
+            rejected.append((line_no, f"artist_id {values[0]} does not exist"))
+    conn.executemany("""
+        INSERT INTO song (artist_id, title, album_name, genre, created_at, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, params)
+    return len(params)
+
+def import_songs(content, format="csv", batch_size=500, commit_per_batch=False):
+    """
+    Insert songs from CSV (with a header row) or NDJSON (one object per
+    line) content. Columns/keys: artist_id, title, album_name, genre.
+
+    artist_ids are checked with one query per batch, and rows are inserted
+    with executemany() in batches of `batch_size`, all in one transaction
+    unless commit_per_batch is True.
+    Returns a dict:
+      {"inserted": int, "rejected": [(line_no, reason), ...], "elapsed": seconds}
+    Raises ValueError for an unknown format or a CSV header lacking a
+    required column.
+    """
+    rejected = []
+    if format == "csv":
+        rows = csv_rows(content, SONG_IMPORT_REQUIRED)
+    elif format == "ndjson":
+        rows = ndjson_rows(content, rejected)
+    else:
+        raise ValueError(f"Unknown import format: {format}")
+    now = datetime.now().isoformat()
+    result = batched_import(
+        rows, _validate_song_row,
+        lambda conn, batch, rejected: _insert_song_batch(conn, batch, now, rejected),
+        batch_size, commit_per_batch, rejected,
+    )
+
+    # New ids may have been cached as misses; executemany() does not report them.
+    song_cache.clear()
+    call_after_transaction(song_cache.clear)
+    return result
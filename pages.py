@@ -0,0 +1,465 @@
+# pages.py
+# HTML for the server's pages, compiled once at import (see templates.py).
+from templates import StaticPage, Template
+
+HOME_PAGE = StaticPage("""
+<html>
+<head><title>Home</title></head>
+<body>
+    <h1>Welcome! Please <a href="/login">Login</a></h1>
+</body>
+</html>
+""")
+
+USER_REGISTER_FORM = StaticPage("""
+<html>
+<head><title>Register User</title></head>
+<body>
+    <h1>Register</h1>
+    <form method="POST" action="/register_user">
+        <p>First Name: <input type="text" name="first_name"></p>
+        <p>Last Name: <input type="text" name="last_name"></p>
+        <p>Email: <input type="email" name="email"></p>
+        <p>Password: <input type="password" name="password"></p>
+        <p>Phone: <input type="phone" name="phone"></p>
+        <p>DOB: <input type="dob" name="dob"></p>
+        <p>Gender: 
+            <select name="gender">
+                <option value="" disabled selected>Select a gender</option> 
+                <option value="m">m</option>
+                <option value="f">f</option>
+                <option value="o">o</option>
+            </select>
+        </p>
+        <p>Address: <input type="address" name="address"></p>
+        <p>Role: 
+            <select name="role">
+                <option value="" disabled selected>Select a role</option> 
+                <option value="artist">artist</option>
+                <option value="artist_manager">artist_manager</option>
+                <option value="super_admin">super_admin</option>
+            </select>
+        </p>
+        <input type="submit" value="Register">
+    </form>
+    <p><a href="/login">Back to Login</a></p>
+    <p><a href="/">Back to Home</a></p>
+</body>
+</html>
+""")
+
+USER_UPDATE_FORM = StaticPage("""
+<html>
+<head><title>Update User</title></head>
+<body>
+    <h1>Update User</h1>
+    <form method="POST" action="/update_user">
+        <p>User ID: <input type="number" name="id"></p>
+        <p>First Name: <input type="text" name="first_name"></p>
+        <p>Last Name: <input type="text" name="last_name"></p>
+        <p>Email: <input type="email" name="email"></p>
+        <p>Password: <input type="password" name="password"></p>
+        <p>Phone: <input type="phone" name="phone"></p>
+        <p>DOB: <input type="dob" name="dob"></p>
+        <p>Gender: 
+        <select name="gender">
+            <option value="" disabled selected>Select a gender</option> 
+            <option value="m">m</option>
+            <option value="f">f</option>
+            <option value="o">o</option>
+        </select>
+        </p>
+        <p>Address: <input type="address" name="address"></p>
+        <p>Role: 
+            <select name="role">
+                <option value="" disabled selected>Select a role</option> 
+                <option value="artist">artist</option>
+                <option value="artist_manager">artist_manager</option>
+                <option value="super_admin">super_admin</option>
+            </select>
+        </p>
+        <input type="submit" value="Update">
+    </form>
+    <p><a href="/">Back to Home</a></p>
+</body>
+</html>
+""")
+
+USER_DELETE_FORM = StaticPage("""
+<html>
+<head><title>Delete User</title></head>
+<body>
+    <h1>Delete</h1>
+    <form method="POST" action="/delete_user">
+        <p>User ID: <input type="number" name="user_id"></p>
+        <input type="submit" value="Delete">
+    </form>
+    <p><a href="/">Back to Home</a></p>
+</body>
+</html>
+""")
+
+ARTIST_REGISTER_FORM = StaticPage("""
+<html>
+<head><title>Register Artist</title></head>
+<body>
+    <h1>Register</h1>
+    <form method="POST" action="/register_artist">
+        <p>User ID: <input type="integer" name="user_id"></p>
+        <p>Name: <input type="text" name="name"></p>
+        <p>DOB: <input type="text" name="dob"></p>
+        <p>Gender: 
+            <select name="gender">
+                <option value="" disabled selected>Select a gender</option> 
+                <option value="m">m</option>
+                <option value="f">f</option>
+                <option value="o">o</option>
+            </select>
+        </p>
+        <p>Address: <input type="text" name="address"></p>
+        <p>First_release_year: <input type="text" name="first_release_year"></p>
+        <p>No_of_albums_released: <input type="text" name="no_of_albums_released"></p>
+        <input type="submit" value="Register">
+    </form>
+    <p><a href="/">Back to Home</a></p>
+</body>
+</html>
+""")
+
+ARTIST_UPDATE_FORM = StaticPage("""
+<html>
+<head><title>Update Artist</title></head>
+<body>
+    <h1>Update Artist</h1>
+    <form method="POST" action="/update_artist">
+        <p>Artist ID: <input type="number" name="id"></p>
+        <p>Name: <input type="text" name="name"></p>
+        <p>DOB: <input type="text" name="dob"></p>
+        <p>Gender: 
+        <select name="gender">
+            <option value="" disabled selected>Select a gender</option> 
+            <option value="m">m</option>
+            <option value="f">f</option>
+            <option value="o">o</option>
+        </select>
+        </p>
+        <p>Address: <input type="text" name="address"></p>
+        <p>First_release_year: <input type="text" name="first_release_year"></p>
+        <p>No_of_albums_released: <input type="number" name="no_of_albums_released"></p>
+        <input type="submit" value="Update">
+    </form>
+    <p><a href="/">Back to Home</a></p>
+</body>
+</html>
+""")
+
+ARTIST_DELETE_FORM = StaticPage("""
+<html>
+<head><title>Delete Artist</title></head>
+<body>
+    <h1>Delete</h1>
+    <form method="POST" action="/delete_artist">
+        <p>Artist ID: <input type="number" name="artist_id"></p>
+        <input type="submit" value="Delete">
+    </form>
+    <p><a href="/">Back to Home</a></p>
+</body>
+</html>
+""")
+
+SONG_REGISTER_FORM = StaticPage("""
+<html>
+<head><title>Register Song</title></head>
+<body>
+    <h1>Register</h1>
+    <form method="POST" action="/register_song">
+        <p>Artist ID: <input type="integer" name="artist_id"></p>
+        <p>Title: <input type="text" name="title"></p>
+        <p>Album Name: <input type="text" name="album_name"></p>
+        <p>Genre: <input type="text" name="genre"></p>
+        <input type="submit" value="Register">
+    </form>
+    <p><a href="/">Back to Home</a></p>
+</body>
+</html>
+""")
+
+SONG_UPDATE_FORM = StaticPage("""
+<html>
+<head><title>Update Song</title></head>
+<body>
+    <h1>Update Song</h1>
+    <form method="POST" action="/update_song">
+        <p>Song ID: <input type="number" name="id"></p>
+        <p>Title: <input type="text" name="title"></p>
+        <p>Album Name: <input type="text" name="album_name"></p>
+        <p>Genre: <input type="text" name="genre"></p>
+        <input type="submit" value="Update">
+    </form>
+    <p><a href="/">Back to Home</a></p>
+</body>
+</html>
+""")
+
+SONG_DELETE_FORM = StaticPage("""
+<html>
+<head><title>Delete Song</title></head>
+<body>
+    <h1>Delete</h1>
+    <form method="POST" action="/delete_song">
+        <p>Song ID: <input type="number" name="id"></p>
+        <input type="submit" value="Delete">
+    </form>
+    <p><a href="/">Back to Home</a></p>
+</body>
+</html>
+""")
+
+LOGIN_FORM = StaticPage("""
+<html>
+<head><title>Login</title></head>
+<body>
+    <h1>Login</h1>
+    <form method="POST" action="/login">
+        <p>Email: <input type="email" name="email"></p>
+        <p>Password: <input type="password" name="password"></p>
+        <input type="submit" value="Login" style="margin-bottom: 10px; display: block;">
+    </form> 
+    
+    <p>New user? <a href="/register_user">Register here</a></p>
+    <p><a href="/">Back to Home</a></p>
+</body>
+</html>
+""")
+
+ARTIST_IMPORT_FORM = StaticPage("""
+<html>
+<head><title>Import Artists (CSV)</title></head>
+<body>
+    <h1>Import Artists (CSV)</h1>
+    <form method="POST" action="/artist_import_form" enctype="application/x-www-form-urlencoded">
+        <p>Paste CSV content here:</p>
+        <textarea name="csv_content" rows="10" cols="50"></textarea><br>
+        <input type="submit" value="Import">
+    </form>
+    <p><a href="/dashboard">Back to Dashboard</a></p>
+</body>
+</html>
+""")
+
+SONG_IMPORT_FORM = StaticPage("""
+<html>
+<head><title>Import Songs</title></head>
+<body>
+    <h1>Import Songs</h1>
+    <form method="POST" action="/song_import_form" enctype="application/x-www-form-urlencoded">
+        <p>Format:
+            <select name="format">
+                <option value="csv" selected>CSV (header: artist_id,title,album_name,genre)</option>
+                <option value="ndjson">NDJSON (one JSON object per line)</option>
+            </select>
+        </p>
+        <p>Paste content here:</p>
+        <textarea name="content" rows="10" cols="50"></textarea><br>
+        <input type="submit" value="Import">
+    </form>
+    <p><a href="/dashboard">Back to Dashboard</a></p>
+</body>
+</html>
+""")
+
+TOO_MANY_LOGINS = StaticPage("<h1>Too many login attempts</h1><p>Please try again later.</p>")
+
+# A failed form submission, with a link back to the form.
+ERROR_PAGE = Template("<h1>{message}</h1><p><a href='{retry}'>Try again</a></p>")
+ERROR_MESSAGE = Template("<h1>{message}</h1>")
+
+# ------------------------
+# Dashboards
+# ------------------------
+
+SUPER_ADMIN_DASHBOARD = Template("""
+<html>
+<head><title>Dashboard</title></head>
+<body>
+    <h1>Dashboard (Super Admin)</h1>
+    {stats}
+    <p><a href="/users">Manage Users</a></p>
+    <p><a href="/artists">Manage Artists</a></p>
+    <p><a href="/songs">Manage Songs</a></p>
+    <p><a href="/search">Search</a></p>
+    <p><a href="/artist_import_form">Import Artists (CSV)</a></p>
+    <p><a href="/artist_export">Export Artists (CSV)</a></p>
+    <p><a href="/song_import_form">Import Songs (CSV/NDJSON)</a></p>
+    <p><a href="/song_export">Export Songs (CSV)</a> | <a href="/song_export?format=ndjson">NDJSON</a></p>
+    <p><a href="/cache_stats">Cache Stats</a></p>
+    <p><a href="/logout">Logout</a></p>
+</body>
+</html>
+""")
+
+ARTIST_MANAGER_DASHBOARD = Template("""
+<html>
+<head><title>Dashboard</title></head>
+<body>
+    <h1>Dashboard (Artist Manager)</h1>
+    {stats}
+    <p><a href="/artists">Manage Artists</a></p>
+    <p><a href="/songs">Manage Songs</a></p>
+    <p><a href="/search">Search</a></p>
+    <p><a href="/artist_import_form">Import Artists (CSV)</a></p>
+    <p><a href="/artist_export">Export Artists (CSV)</a></p>
+    <p><a href="/song_import_form">Import Songs (CSV/NDJSON)</a></p>
+    <p><a href="/song_export">Export Songs (CSV)</a> | <a href="/song_export?format=ndjson">NDJSON</a></p>
+    <p><a href="/logout">Logout</a></p>
+</body>
+</html>
+""")
+
+# Counts from catalog_stat (stats.py).
+CATALOG_STATS = Template("<h2>Catalog</h2><p>Artists: {artists} | Songs: {songs}</p>{tables}")
+STAT_TABLE = Template(
+    "<h3>{title}</h3><table border='1'>"
+    "<tr><th>{key_label}</th><th>{count_label}</th></tr>"
+    "{rows}</table>"
+)
+# Row: (label, count)
+STAT_ROW = Template("<tr><td>{0}</td><td>{1}</td></tr>")
+
+ARTIST_DASHBOARD = Template("""
+<html>
+<head><title>Dashboard</title></head>
+<body>
+    <h1>Dashboard (Artist)</h1>
+    <h2>Your Songs:</h2>
+    {songs}
+    <p><a href="/songs">Manage Songs</a></p>
+    <p><a href="/logout">Logout</a></p>
+</body>
+</html>
+""")
+ARTIST_DASHBOARD_SONGS = Template("<ul>{items}</ul>")
+ARTIST_DASHBOARD_NO_SONGS = Template("<p>No songs found.</p>")
+# Row: (song id, album name, genre)
+SONG_ITEM = Template("<li>{1} ({2})</li>")
+
+# ------------------------
+# List pages
+# ------------------------
+
+USER_LIST = Template(
+    "<h1>User List</h1><table border='1'>"
+    "<tr><th>ID</th><th>Name</th><th>Email</th><th>Role</th></tr>"
+    "{rows}</table>{page_links}"
+    "<p><a href='/update_user'>Update User</a></p>"
+    "<p><a href='/delete_user'>Delete User</a></p>"
+    "<p><a href='/dashboard'>Back to Dashboard</a></p>"
+)
+# Row: (id, first_name, last_name, email, role)
+USER_ROW = Template("<tr><td>{0}</td><td>{1} {2}</td><td>{3}</td><td>{4}</td></tr>")
+
+ARTIST_LIST = Template(
+    "<h1>Artist List</h1><table border='1'>"
+    "<tr><th>ID</th>Name<th></th><th>Gender</th><th>First Release Year</th><th>#Albums</th><th>Actions</th></tr>"
+    "{rows}</table>{page_links}"
+    "<p><a href='/register_artist'>Create Artist</a></p>"
+    "<p><a href='/update_artist'>Update Artist</a></p>"
+    "<p><a href='/delete_artist'>Delete Artist</a></p>"
+    "<p><a href='/dashboard'>Back to Dashboard</a></p>"
+)
+# Row: (id, user_id, name, gender, first_release_year, no_of_albums_released)
+ARTIST_ROW = Template(
+    "<tr><td>{0}</td><td>{2}</td><td>{3}</td><td>{4}</td><td>{5}</td>"
+    "<td><a href='/artist_songs?artist_id={0}'>View Songs</a></td></tr>"
+)
+
+SONG_LIST = Template(
+    "<h1>Song List</h1><table border='1'>"
+    "<tr><th>ID</th><th>Artist ID</th><th>Album Name</th><th>Type</th></tr>"
+    "{rows}</table>{page_links}"
+    "<p><a href='/register_song'>Create Song</a></p>"
+    "<p><a href='/update_song'>Update Song</a></p>"
+    "<p><a href='/delete_song'>Delete Song</a></p>"
+    "<p><a href='/dashboard'>Back to Dashboard</a></p>"
+)
+# Row: (id, artist_id, album_name, genre)
+SONG_ROW = Template("<tr><td>{0}</td><td>{1}</td><td>{2}</td><td>{3}</td></tr>")
+
+# The artist's songs page is unbounded, so it is streamed: head, rows, tail.
+ARTIST_SONGS_HEAD = Template("<h1>Artist {artist_id} Songs</h1><ul>")
+ARTIST_SONGS_EMPTY = "<li>No songs found.</li>"
+ARTIST_SONGS_TAIL = "</ul><p><a href='/artists'>Back to Artists</a></p>"
+
+# ------------------------
+# Search
+# ------------------------
+
+SEARCH_PAGE = Template(
+    "<h1>Search</h1>"
+    "<form method='GET' action='/search'>"
+    "<input type='text' name='q' value='{q}'> "
+    "<select name='in'>"
+    "<option value='songs'{songs_selected}>Songs</option>"
+    "<option value='artists'{artists_selected}>Artists</option>"
+    "</select> "
+    "<input type='submit' value='Search'>"
+    "</form>"
+    "{results}"
+    "<p><a href='/dashboard'>Back to Dashboard</a></p>"
+)
+SEARCH_SONG_RESULTS = Template(
+    "<table border='1'>"
+    "<tr><th>ID</th><th>Artist ID</th><th>Title</th><th>Album Name</th><th>Genre</th></tr>"
+    "{rows}</table>{page_links}"
+)
+# Row: (id, artist_id, title, album_name, genre)
+SEARCH_SONG_ROW = Template(
+    "<tr><td>{0}</td><td><a href='/artist_songs?artist_id={1}'>{1}</a></td>"
+    "<td>{2}</td><td>{3}</td><td>{4}</td></tr>"
+)
+SEARCH_ARTIST_RESULTS = Template(
+    "<table border='1'>"
+    "<tr><th>ID</th><th>Name</th><th>Gender</th><th>First Release Year</th><th>#Albums</th><th>Actions</th></tr>"
+    "{rows}</table>{page_links}"
+)
+SEARCH_NO_RESULTS = Template("<p>No matches.</p>")
+SEARCH_LINK = Template("<a href='/search?{query}'>{label}</a>")
+
+PAGE_LINKS = Template("<p>{links}</p>")
+PAGE_LINK = Template("<a href='{path}?{cursor}={id}&limit={limit}'>{label}</a>")
+LINK_SEPARATOR = " | "
+
+# ------------------------
+# Admin pages
+# ------------------------
+
+CACHE_STATS = Template(
+    "<h1>Cache Stats</h1><table border='1'>"
+    "<tr><th>Cache</th><th>Size</th><th>Max Size</th><th>Hits</th><th>Misses</th><th>Evictions</th></tr>"
+    "{rows}</table>"
+    "<h2>Login Admission</h2><table border='1'>"
+    "<tr><th>Limit</th><th>Rejections</th></tr>"
+    "<tr><td>Per client address</td><td>{client_rejections}</td></tr>"
+    "<tr><td>Per email</td><td>{email_rejections}</td></tr>"
+    "<tr><td>Concurrent verifications ({inflight_limit})</td><td>{inflight_rejections}</td></tr>"
+    "</table>"
+    "<p><a href='/dashboard'>Back to Dashboard</a></p>"
+)
+# Row: (name, size, maxsize, hits, misses, evictions)
+CACHE_STATS_ROW = Template(
+    "<tr><td>{0}</td><td>{1}</td><td>{2}</td><td>{3}</td><td>{4}</td><td>{5}</td></tr>"
+)
+
+IMPORT_RESULT = Template(
+    "<h1>Import Finished</h1>"
+    "<p>Inserted: {inserted}</p>"
+    "<p>Rejected: {rejected}</p>"
+    "<p>Elapsed: {elapsed:.3f} s</p>"
+    "{errors}"
+    "<p><a href='{import_form}'>Import more</a></p>"
+    "<p><a href='/dashboard'>Back</a></p>"
+)
+IMPORT_ERRORS = Template("<table border='1'><tr><th>Line</th><th>Reason</th></tr>{rows}</table>{more}")
+# Row: (line number, reason)
+IMPORT_ERROR_ROW = Template("<tr><td>{0}</td><td>{1}</td></tr>")
+IMPORT_ERRORS_MORE = Template("<p>... and {count} more</p>")
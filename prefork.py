@@ -0,0 +1,124 @@
+# prefork.py
+import os
+import signal
+import time
+
+
+class PreforkSupervisor:
+    """
+    Fork `workers` child processes that each run `target()` and keep that many
+    alive: a child that dies is replaced. On SIGTERM/SIGINT the children are
+    asked to stop with SIGTERM and given `drain_timeout` seconds to finish
+    in-flight requests before they are killed.
+
+    Each worker leads its own process group, so killing a worker also kills
+    the processes it started (e.g. its password-hashing pool) instead of
+    leaving them orphaned.
+    """
+
+    # A child that dies sooner than this after starting is restarted with a
+    # delay, so a worker that crashes on startup does not spin the CPU.
+    MIN_UPTIME = 1.0
+    # How often the supervisor checks for exited children.
+    POLL_INTERVAL = 0.1
+
+    def __init__(self, workers, target, drain_timeout=30):
+        self.workers = workers
+        self.target = target
+        self.drain_timeout = drain_timeout
+        self.children = {}  # pid -> start time
+        self.stopping = False
+        self.deadline = None
+
+    def _spawn(self):
+        pid = os.fork()
+        if pid == 0:
+            # Child: own process group, default signal handling, run the
+            # worker, never return.
+            os.setpgid(0, 0)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            status = 0
+            try:
+                self.target()
+            except BaseException:
+                import traceback
+                traceback.print_exc()
+                status = 1
+            finally:
+                os._exit(status)
+        try:
+            # Also set from the parent, so the group exists before any kill.
+            os.setpgid(pid, pid)
+        except (PermissionError, ProcessLookupError):
+            pass  # The child already did it (and may have exec'd or exited).
+        self.children[pid] = time.monotonic()
+        print(f"[supervisor] started worker {pid}")
+
+    def _request_stop(self, signum, frame):
+        if not self.stopping:
+            self.stopping = True
+            self.deadline = time.monotonic() + self.drain_timeout
+            print(f"[supervisor] received signal {signum}, draining {len(self.children)} workers")
+            for pid in list(self.children):
+                self._kill(pid, signal.SIGTERM)
+
+    def _kill(self, pid, sig):
+        try:
+            os.kill(pid, sig)
+        except ProcessLookupError:
+            pass
+
+    def _kill_group(self, pid, sig):
+        """Signal the worker `pid` and every process it started."""
+        try:
+            os.killpg(pid, sig)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    def _reap(self):
+        """Collect exited children without blocking; returns [(pid, status, start time)]."""
+        exited = []
+        while self.children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                self.children.clear()
+                break
+            if pid == 0:
+                break
+            if pid in self.children:
+                exited.append((pid, status, self.children.pop(pid)))
+                # Whatever the worker left behind in its group goes too.
+                self._kill_group(pid, signal.SIGKILL)
+        return exited
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+        for _ in range(self.workers):
+            self._spawn()
+
+        # Poll rather than block in waitpid(): a blocking wait is restarted
+        # after the signal handler runs, so the drain deadline could not be
+        # enforced while no worker exits.
+        while not self.stopping:
+            for pid, status, started in self._reap():
+                if self.stopping:
+                    break
+                print(f"[supervisor] worker {pid} exited with status {status}, restarting")
+                if time.monotonic() - started < self.MIN_UPTIME:
+                    time.sleep(self.MIN_UPTIME)
+                self._spawn()
+            time.sleep(self.POLL_INTERVAL)
+
+        while self.children and time.monotonic() < self.deadline:
+            self._reap()
+            time.sleep(self.POLL_INTERVAL)
+        for pid in list(self.children):
+            print(f"[supervisor] worker {pid} did not drain in time, killing")
+            self._kill_group(pid, signal.SIGKILL)
+        while self.children:
+            self._reap()
+            time.sleep(self.POLL_INTERVAL)
+        print("[supervisor] all workers stopped")
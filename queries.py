@@ -0,0 +1,58 @@
+# queries.py
+# Helpers for building SQL from caller-supplied column names. Names are
+# only ever interpolated after being checked against a per-table whitelist.
+import functools
+import re
+
+
+@functools.lru_cache(maxsize=256)
+def projection(fields, allowed, prefix=""):
+    """
+    Return (names, column_sql) for selecting `fields` (a tuple of column
+    names) out of `allowed`. The id always comes first, since it is the
+    pagination cursor. Raises ValueError for names not in `allowed`.
+    """
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+    names = ("id",) + tuple(field for field in dict.fromkeys(fields) if field != "id")
+    return names, ", ".join(prefix + name for name in names)
+
+
+def fts_match_query(text):
+    """
+    Turn free text typed by a user into an FTS5 MATCH expression: every
+    word must match, as a prefix ("beat lov" finds "Beatles - Love Me Do").
+    Words are quoted, so FTS5 operators in the input are matched literally.
+    Returns None when the text has no words.
+    """
+    words = re.findall(r"\w+", text)
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
+
+
+@functools.lru_cache(maxsize=256)
+def update_statement(table, fields, allowed, many=False):
+    """
+    The UPDATE text setting `fields` (a sorted tuple of column names) and
+    updated_at on one row (`id = ?`) or, with many, on every id in a JSON
+    array parameter. Built once per field set, so the text is identical on
+    every call and SQLite's statement cache is reused. Raises ValueError
+    for names not in `allowed`.
+    """
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        raise ValueError(f"Cannot update {table} column(s): {', '.join(unknown)}")
+    set_str = ", ".join(f"{field} = ?" for field in fields + ("updated_at",))
+    where = "id IN (SELECT value FROM json_each(?))" if many else "id = ?"
+    return f"UPDATE {table} SET {set_str} WHERE {where}"
+
+
+def build_update(table, allowed, fields, many=False):
+    """
+    (sql, values) for update_statement() from a {column: value} dict; the
+    caller appends the updated_at value and the id (or JSON id list).
+    """
+    names = tuple(sorted(fields))
+    return update_statement(table, names, allowed, many), [fields[name] for name in names]
@@ -0,0 +1,81 @@
+# ratelimit.py
+import math
+import threading
+import time
+from collections import OrderedDict
+
+
+class TokenBucket:
+    """
+    Classic token bucket: holds up to `capacity` tokens and refills at `rate`
+    tokens per second. Not thread-safe on its own; KeyedRateLimiter locks.
+    """
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate, capacity, now):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def take(self, now):
+        """Take one token. Returns 0 on success, else seconds until one is available."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+
+class KeyedRateLimiter:
+    """
+    One token bucket per key (client address, email, ...). At most `max_keys`
+    buckets are tracked; the least recently used are dropped first, which
+    only ever forgives a key, never blocks one.
+    """
+
+    def __init__(self, rate, capacity, max_keys=100000, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.max_keys = max_keys
+        self._clock = clock
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+        self.rejections = 0
+
+    def hit(self, key):
+        """Count one request for key. Returns 0 if allowed, else whole seconds to wait."""
+        now = self._clock()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(self.rate, self.capacity, now)
+                while len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+            wait = bucket.take(now)
+            if wait:
+                self.rejections += 1
+                return max(1, math.ceil(wait))
+            return 0
+
+
+class ConcurrencyLimiter:
+    """Caps how many callers may be inside a section at once, without queueing."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self._slots = threading.BoundedSemaphore(limit)
+        self.rejections = 0
+
+    def try_acquire(self):
+        if self._slots.acquire(blocking=False):
+            return True
+        self.rejections += 1  # racy increment is fine for a counter
+        return False
+
+    def release(self):
+        self._slots.release()
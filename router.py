@@ -0,0 +1,40 @@
+# router.py
+from collections import namedtuple
+
+# roles: the session roles allowed to call the handler, or None for a public route.
+Route = namedtuple("Route", ["handler", "roles"])
+
+
+class Router:
+    """
+    Route table mapping (method, path) to a handler, filled in with the
+    `route` decorator:
+
+        ROUTES = Router()
+
+        class Handler(...):
+            @ROUTES.route('GET', '/users', roles=('super_admin',))
+            def handle_list_users(self, query): ...
+
+    Lookup is a single dict access. Handlers are stored unbound and take
+    the request handler and the parsed query string or form data.
+    """
+
+    def __init__(self):
+        self._routes = {}
+
+    def route(self, method, path, roles=None):
+        def register(handler):
+            key = (method, path)
+            if key in self._routes:
+                raise ValueError(f"Route already registered: {method} {path}")
+            self._routes[key] = Route(handler, frozenset(roles) if roles is not None else None)
+            return handler
+        return register
+
+    def resolve(self, method, path):
+        """The Route for `method` and `path`, or None."""
+        return self._routes.get((method, path))
+
+    def __iter__(self):
+        return iter(self._routes.items())
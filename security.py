@@ -1,34 +1,117 @@
 # security.py
 import os
 import hashlib
+import hmac
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
 
-def hash_password(password: str) -> bytes:
+import config
+
+# Stored values look like b"pbkdf2_sha256$<iterations>$<salt hex>$<hash hex>".
+# Values written before the format existed are the raw 16-byte salt followed
+# by the 32-byte hash, always with 100,000 iterations.
+HASH_ALGORITHM = "pbkdf2_sha256"
+LEGACY_ITERATIONS = 100_000
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _pbkdf2(password, salt, iterations):
+    return hashlib.pbkdf2_hmac('sha256', password.encode(), salt, iterations)
+
+
+def _exit_with_parent(parent_pid):
+    """
+    Pool process initializer: exit once the server process is gone. A
+    killed server never shuts its pool down, and the pool processes would
+    otherwise wait on their call queue forever.
+    """
+    def watch():
+        while os.getppid() == parent_pid:
+            time.sleep(1.0)
+        os._exit(1)
+
+    threading.Thread(target=watch, name="ams-parent-watch", daemon=True).start()
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # fork (rather than spawn) so scripts without a __main__ guard can
+            # hash too; with fork all workers are started on the first submit.
+            _pool = ProcessPoolExecutor(
+                max_workers=config.HASH_WORKERS,
+                mp_context=multiprocessing.get_context("fork"),
+                initializer=_exit_with_parent,
+                initargs=(os.getpid(),),
+            )
+        return _pool
+
+
+def start_pool():
+    """
+    Start the hashing processes now. Servers call this before they start
+    their own threads, so the workers are forked from a single-threaded
+    process.
+    """
+    if config.HASH_WORKERS > 0:
+        _get_pool().submit(int).result()
+
+
+def _compute(password, salt, iterations):
+    """
+    Run PBKDF2 in the hashing process pool, so the request thread only waits
+    and never holds the GIL for the 100k rounds. With HASH_WORKERS = 0 the
+    hash is computed inline instead.
+    """
+    if config.HASH_WORKERS <= 0:
+        return _pbkdf2(password, salt, iterations)
+    return _get_pool().submit(_pbkdf2, password, salt, iterations).result()
+
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
+
+
+def _parse(stored_value):
+    """Return (algorithm, iterations, salt, hash) for a stored password value."""
+    stored_value = bytes(stored_value)
+    if stored_value.startswith(HASH_ALGORITHM.encode() + b"$"):
+        algorithm, iterations, salt, hashed = stored_value.decode().split("$")
+        return algorithm, int(iterations), bytes.fromhex(salt), bytes.fromhex(hashed)
+    return "legacy", LEGACY_ITERATIONS, stored_value[:16], stored_value[16:]
+
+
+def hash_password(password: str, iterations=None) -> bytes:
     """
     Hash a plaintext password using PBKDF2-HMAC (SHA256) with a random salt.
-    Returns the salt+hash as bytes.
+    Returns the algorithm, iteration count, salt and hash as one bytes value.
     """
+    iterations = iterations or config.HASH_ITERATIONS
     salt = os.urandom(16)  # 16-byte salt
-    hashed = hashlib.pbkdf2_hmac(
-        'sha256',           # hash function
-        password.encode(),  # convert the password to bytes
-        salt,
-        100_000             # number of iterations
-    )
-    # Store salt + hashed password in one field:
-    return salt + hashed
+    hashed = _compute(password, salt, iterations)
+    return f"{HASH_ALGORITHM}${iterations}${salt.hex()}${hashed.hex()}".encode()
+
 
 def verify_password(stored_value: bytes, provided_password: str) -> bool:
     """
-    Verify a provided password by extracting the salt from the stored_value
-    and re-computing the hash.
-    """
-    salt = stored_value[:16]
-    stored_hash = stored_value[16:]
-    
-    new_hash = hashlib.pbkdf2_hmac(
-        'sha256',
-        provided_password.encode(),
-        salt,
-        100_000
-    )
-    return new_hash == stored_hash
+    Verify a provided password by extracting the salt and parameters from the
+    stored_value and re-computing the hash.
+    """
+    _, iterations, salt, stored_hash = _parse(stored_value)
+    new_hash = _compute(provided_password, salt, iterations)
+    return hmac.compare_digest(new_hash, stored_hash)
+
+
+def needs_rehash(stored_value: bytes) -> bool:
+    """True if stored_value was made with other parameters than the configured ones."""
+    algorithm, iterations, _, _ = _parse(stored_value)
+    return algorithm != HASH_ALGORITHM or iterations != config.HASH_ITERATIONS
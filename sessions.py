@@ -0,0 +1,194 @@
+# sessions.py
+import threading
+import time
+from collections import OrderedDict
+
+from db_pool import get_connection, transaction
+
+
+class SessionRecord:
+    """What the server remembers about a logged-in session."""
+
+    __slots__ = ("user_id", "role", "created_at", "last_seen")
+
+    def __init__(self, user_id, role, now):
+        self.user_id = user_id
+        self.role = role
+        self.created_at = now
+        self.last_seen = now
+
+
+class SessionStore:
+    """
+    Thread-safe in-memory session store.
+
+    A session expires when it has been idle for `idle_ttl` seconds or is
+    older than `absolute_ttl` seconds, whichever comes first. At most
+    `max_sessions` are kept; past that the least recently used session is
+    evicted. Sessions are kept in last-used order, so expired and evicted
+    entries are always at the front and removing them is cheap.
+    """
+
+    def __init__(self, idle_ttl=1800, absolute_ttl=43200, max_sessions=10000, clock=time.monotonic):
+        self.idle_ttl = idle_ttl
+        self.absolute_ttl = absolute_ttl
+        self.max_sessions = max_sessions
+        self._clock = clock
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def _expired(self, record, now):
+        return (now - record.last_seen > self.idle_ttl
+                or now - record.created_at > self.absolute_ttl)
+
+    def _purge_front(self, now):
+        # Oldest last_seen first: stop at the first session still in use.
+        while self._sessions:
+            session_id, record = next(iter(self._sessions.items()))
+            if not self._expired(record, now):
+                break
+            del self._sessions[session_id]
+            self.expirations += 1
+
+    def add(self, session_id, user_id, role):
+        now = self._clock()
+        with self._lock:
+            self._purge_front(now)
+            self._sessions[session_id] = SessionRecord(user_id, role, now)
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evictions += 1
+
+    def get(self, session_id):
+        """Return the live SessionRecord for session_id (refreshing its idle timer), or None."""
+        now = self._clock()
+        with self._lock:
+            record = self._sessions.get(session_id)
+            if record is None:
+                return None
+            if self._expired(record, now):
+                del self._sessions[session_id]
+                self.expirations += 1
+                return None
+            record.last_seen = now
+            self._sessions.move_to_end(session_id)
+            return record
+
+    def remove(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def update_role(self, user_id, role):
+        """Change the cached role on every session of user_id."""
+        with self._lock:
+            for record in self._sessions.values():
+                if record.user_id == user_id:
+                    record.role = role
+
+    def remove_user(self, user_id):
+        """Drop every session belonging to user_id."""
+        with self._lock:
+            stale = [sid for sid, record in self._sessions.items() if record.user_id == user_id]
+            for session_id in stale:
+                del self._sessions[session_id]
+
+    def purge_expired(self):
+        """Remove every expired session; returns how many were removed."""
+        now = self._clock()
+        with self._lock:
+            stale = [sid for sid, record in self._sessions.items() if self._expired(record, now)]
+            for session_id in stale:
+                del self._sessions[session_id]
+            self.expirations += len(stale)
+            return len(stale)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
+
+
+class SqliteSessionStore:
+    """
+    SessionStore with the same interface, kept in the `session` table so every
+    server process sees the same sessions (pre-fork mode). Uses wall-clock
+    time, since timestamps are compared across processes. last_seen is only
+    written back every `touch_interval` seconds to keep reads read-only.
+    """
+
+    def __init__(self, idle_ttl=1800, absolute_ttl=43200, max_sessions=10000,
+                 touch_interval=60, clock=time.time):
+        self.idle_ttl = idle_ttl
+        self.absolute_ttl = absolute_ttl
+        self.max_sessions = max_sessions
+        self.touch_interval = touch_interval
+        self._clock = clock
+        self.evictions = 0
+        self.expirations = 0
+
+    def _expired(self, record, now):
+        return (now - record.last_seen > self.idle_ttl
+                or now - record.created_at > self.absolute_ttl)
+
+    def add(self, session_id, user_id, role):
+        now = self._clock()
+        with transaction() as connection_obj:
+            connection_obj.execute(
+                "DELETE FROM session WHERE last_seen < ? OR created_at < ?",
+                (now - self.idle_ttl, now - self.absolute_ttl))
+            connection_obj.execute(
+                "INSERT OR REPLACE INTO session (id, user_id, role, created_at, last_seen) VALUES (?, ?, ?, ?, ?)",
+                (session_id, user_id, role, now, now))
+            count = connection_obj.execute("SELECT COUNT(*) FROM session").fetchone()[0]
+            if count > self.max_sessions:
+                connection_obj.execute("""
+                    DELETE FROM session WHERE id IN (
+                        SELECT id FROM session ORDER BY last_seen ASC LIMIT ?
+                    )
+                """, (count - self.max_sessions,))
+                self.evictions += count - self.max_sessions
+
+    def get(self, session_id):
+        now = self._clock()
+        row = get_connection().execute(
+            "SELECT user_id, role, created_at, last_seen FROM session WHERE id = ?",
+            (session_id,)).fetchone()
+        if row is None:
+            return None
+        record = SessionRecord(row[0], row[1], row[2])
+        record.last_seen = row[3]
+        if self._expired(record, now):
+            self.remove(session_id)
+            self.expirations += 1
+            return None
+        if now - record.last_seen > self.touch_interval:
+            with transaction() as connection_obj:
+                connection_obj.execute("UPDATE session SET last_seen = ? WHERE id = ?", (now, session_id))
+            record.last_seen = now
+        return record
+
+    def remove(self, session_id):
+        with transaction() as connection_obj:
+            connection_obj.execute("DELETE FROM session WHERE id = ?", (session_id,))
+
+    def update_role(self, user_id, role):
+        with transaction() as connection_obj:
+            connection_obj.execute("UPDATE session SET role = ? WHERE user_id = ?", (role, user_id))
+
+    def remove_user(self, user_id):
+        with transaction() as connection_obj:
+            connection_obj.execute("DELETE FROM session WHERE user_id = ?", (user_id,))
+
+    def purge_expired(self):
+        now = self._clock()
+        with transaction() as connection_obj:
+            cursor_obj = connection_obj.execute(
+                "DELETE FROM session WHERE last_seen < ? OR created_at < ?",
+                (now - self.idle_ttl, now - self.absolute_ttl))
+            self.expirations += cursor_obj.rowcount
+            return cursor_obj.rowcount
+
+    def __len__(self):
+        return get_connection().execute("SELECT COUNT(*) FROM session").fetchone()[0]
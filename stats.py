@@ -0,0 +1,85 @@
+# stats.py
+"""
+Catalog statistics kept in the catalog_stat table (see database.py).
+Triggers update them on every write, so reads never scan song or artist.
+
+    python stats.py [--check]
+
+Recounts everything from the data tables, reports where the stored
+counters had drifted and replaces them with the fresh counts. With
+--check it only reports, and exits non-zero if anything drifted.
+"""
+import sys
+
+from database import create_tables, count_catalog_stats, rebuild_catalog_stats
+from db_pool import get_connection, transaction, close_connection
+
+
+def get_stat(kind, key=""):
+    """One counter, e.g. get_stat("songs") or get_stat("songs_by_artist", 3)."""
+    row = get_connection().execute(
+        "SELECT count FROM catalog_stat WHERE kind = ? AND key = ?", (kind, key)).fetchone()
+    return row[0] if row else 0
+
+
+def top_stats(kind, limit=10):
+    """The largest counters of a grouped kind, as [(key, count)], largest first."""
+    return get_connection().execute("""
+        SELECT key, count
+        FROM catalog_stat
+        WHERE kind = ?
+        ORDER BY count DESC, key
+        LIMIT ?
+    """, (kind, limit)).fetchall()
+
+
+def find_drift(connection_obj, stored=None):
+    """
+    Compare the stored counters with a recount: [(kind, key, stored, actual)]
+    for every counter that differs.
+    """
+    if stored is None:
+        stored = {(kind, key): count for kind, key, count in
+                  connection_obj.execute("SELECT kind, key, count FROM catalog_stat")}
+    actual = count_catalog_stats(connection_obj)
+    drift = []
+    for stat in sorted(stored.keys() | actual.keys(), key=lambda stat: (stat[0], str(stat[1]))):
+        if stored.get(stat, 0) != actual.get(stat, 0):
+            drift.append((stat[0], stat[1], stored.get(stat, 0), actual.get(stat, 0)))
+    return drift
+
+
+def reconcile(fix=True):
+    """
+    Recount the statistics and return the drift found (see find_drift).
+    With fix, the table is rebuilt in the same transaction, so no write can
+    slip in between the comparison and the rebuild.
+    """
+    with transaction() as connection_obj:
+        if not connection_obj.in_transaction:
+            # Take the write lock before reading, not at the first write.
+            connection_obj.execute("BEGIN IMMEDIATE")
+        drift = find_drift(connection_obj)
+        if fix and drift:
+            rebuild_catalog_stats(connection_obj)
+    return drift
+
+
+def main():
+    fix = "--check" not in sys.argv[1:]
+    try:
+        create_tables()
+        drift = reconcile(fix=fix)
+    finally:
+        close_connection()
+    for kind, key, stored, actual in drift:
+        print(f"{kind}[{key!r}]: stored {stored}, actual {actual}")
+    if not drift:
+        print("OK: catalog statistics match the data")
+        return 0
+    print(f"{len(drift)} counter(s) drifted" + ("; rebuilt" if fix else ""))
+    return 1 if not fix else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+# templates.py
+import html
+import string
+
+import compression
+import config
+
+
+class Markup(str):
+    """A string that is already HTML; templates insert it without escaping."""
+
+
+class Fragment(list):
+    """Already-escaped HTML parts; inserted into a template without joining."""
+
+
+def escape(value):
+    if isinstance(value, Markup):
+        return value
+    return html.escape(str(value), quote=True)
+
+
+class Template:
+    """
+    HTML template using str.format-style fields: "{name}", "{0}" (positional,
+    handy for database rows) and "{{"/"}}" for literal braces. The source is
+    parsed once, at import; rendering appends literal and escaped parts to a
+    list that is joined once at the end. Fragment values (see render_rows)
+    are spliced in without an intermediate join.
+    """
+
+    def __init__(self, source):
+        self._parts = []  # (literal text, field name or None, format spec)
+        for literal, field, spec, conversion in string.Formatter().parse(source):
+            if conversion:
+                raise ValueError(f"Conversions are not supported in templates: {field}!{conversion}")
+            self._parts.append((literal, field, spec or ""))
+
+    def render_into(self, out, *args, **kwargs):
+        for literal, field, spec in self._parts:
+            if literal:
+                out.append(literal)
+            if field is None:
+                continue
+            value = args[int(field)] if field.isdigit() else kwargs[field]
+            if isinstance(value, Fragment):
+                out.extend(value)
+            elif spec:
+                out.append(escape(format(value, spec)))
+            else:
+                out.append(escape(value))
+        return out
+
+    def render(self, *args, **kwargs):
+        return "".join(self.render_into([], *args, **kwargs))
+
+    def render_rows(self, rows):
+        """Render the template once per row (a tuple, fields "{0}", "{1}", ...)."""
+        out = Fragment()
+        for row in rows:
+            self.render_into(out, *row)
+        return out
+
+    def iter_rows(self, rows, batch_size=200):
+        """Yield the rendered rows as str chunks of `batch_size` rows, for streaming."""
+        out = []
+        for count, row in enumerate(rows, 1):
+            self.render_into(out, *row)
+            if count % batch_size == 0:
+                yield "".join(out)
+                out = []
+        if out:
+            yield "".join(out)
+
+
+class StaticPage:
+    """
+    A page with no variable parts: encoded to UTF-8 once and compressed at
+    most once per Content-Encoding.
+    """
+
+    def __init__(self, source):
+        self.body = source.encode("utf-8")
+        self._compressed = {}
+
+    def encoded(self, encoding):
+        """The body for Content-Encoding `encoding` (None for identity)."""
+        if encoding is None:
+            return self.body
+        body = self._compressed.get(encoding)
+        if body is None:
+            body = self._compressed[encoding] = compression.compress(self.body, encoding, config.COMPRESSION_LEVEL)
+        return body
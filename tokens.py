@@ -0,0 +1,168 @@
+# tokens.py
+import base64
+import hashlib
+import hmac
+import os
+import threading
+import time
+
+from db_pool import get_connection, transaction
+from sessions import SessionRecord
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def parse_keys(spec):
+    """
+    Parse "kid1:secret1,kid2:secret2" into an ordered {kid: secret bytes}.
+    The first key signs new tokens; the others are only accepted, which is
+    how keys are rotated: prepend the new key, drop the old one once every
+    token it signed has expired.
+    """
+    keys = {}
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        kid, sep, secret = item.partition(":")
+        if not sep or not kid or not secret or "." in kid:
+            raise ValueError(f"Bad session key entry {item!r}, expected kid:secret")
+        keys[kid] = secret.encode()
+    return keys
+
+
+class RevocationList:
+    """
+    Revoked tokens (by jti) and users (every token issued before a time).
+    Entries are written to the token_revocation table and mirrored in memory;
+    the mirror picks up other processes' entries at most every
+    `refresh_interval` seconds, so checking a token needs no per-request
+    lookup. Entries are dropped once the tokens they cover have expired.
+    """
+
+    def __init__(self, refresh_interval=5, clock=time.time):
+        self.refresh_interval = refresh_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._jtis = {}    # jti -> expires_at
+        self._users = {}   # user_id -> (revoked_at, expires_at)
+        self._last_row = 0
+        self._next_refresh = 0
+
+    def _load(self, rows):
+        for row_id, jti, user_id, revoked_at, expires_at in rows:
+            if jti is not None:
+                self._jtis[jti] = expires_at
+            else:
+                previous = self._users.get(user_id)
+                if previous is None or revoked_at > previous[0]:
+                    self._users[user_id] = (revoked_at, expires_at)
+            self._last_row = max(self._last_row, row_id)
+
+    def _refresh(self, now):
+        if now < self._next_refresh:
+            return
+        self._next_refresh = now + self.refresh_interval
+        rows = get_connection().execute(
+            "SELECT id, jti, user_id, revoked_at, expires_at FROM token_revocation WHERE id > ?",
+            (self._last_row,)).fetchall()
+        self._load(rows)
+        self._jtis = {jti: exp for jti, exp in self._jtis.items() if exp > now}
+        self._users = {uid: entry for uid, entry in self._users.items() if entry[1] > now}
+
+    def _add(self, jti, user_id, expires_at):
+        now = self._clock()
+        with transaction() as connection_obj:
+            connection_obj.execute("DELETE FROM token_revocation WHERE expires_at < ?", (now,))
+            cursor_obj = connection_obj.execute(
+                "INSERT INTO token_revocation (jti, user_id, revoked_at, expires_at) VALUES (?, ?, ?, ?)",
+                (jti, user_id, now, expires_at))
+            row = (cursor_obj.lastrowid, jti, user_id, now, expires_at)
+        with self._lock:
+            self._load([row])
+
+    def revoke_token(self, jti, expires_at):
+        self._add(jti, None, expires_at)
+
+    def revoke_user(self, user_id, expires_at):
+        """Invalidate every token of user_id issued up to now."""
+        self._add(None, user_id, expires_at)
+
+    def is_revoked(self, jti, user_id, issued_at):
+        with self._lock:
+            self._refresh(self._clock())
+            if jti in self._jtis:
+                return True
+            entry = self._users.get(user_id)
+            return entry is not None and issued_at <= entry[0]
+
+
+class SignedSessions:
+    """
+    Stateless session tokens: "<kid>.<payload>.<signature>" where the payload
+    carries user id, role, issue time (ms), expiry time (s) and a random token id (jti),
+    and the signature is HMAC-SHA256 with the key named by kid.
+    """
+
+    def __init__(self, keys, ttl=3600, revocations=None, clock=time.time):
+        self.keys = keys
+        self.ttl = ttl
+        self.revocations = revocations or RevocationList()
+        self._clock = clock
+
+    def _sign(self, kid, payload):
+        mac = hmac.new(self.keys[kid], f"{kid}.{payload}".encode(), hashlib.sha256)
+        return _b64encode(mac.digest())
+
+    def issue(self, user_id, role):
+        if not self.keys:
+            raise RuntimeError("Signed sessions need AMS_SESSION_KEYS to be set")
+        kid = next(iter(self.keys))
+        now = self._clock()
+        jti = _b64encode(os.urandom(9))
+        # Issue time in ms so a token issued right after revoke_user() is not
+        # caught by it.
+        payload = _b64encode(f"{user_id}|{role}|{int(now * 1000)}|{int(now) + self.ttl}|{jti}".encode())
+        return f"{kid}.{payload}.{self._sign(kid, payload)}"
+
+    def _decode(self, token):
+        """Return (user_id, role, issued_at_ms, expires_at, jti) for a well-signed token, else None."""
+        # Tokens are base64url; compare_digest() raises TypeError on
+        # non-ASCII str, so such cookies are simply invalid.
+        if not token.isascii():
+            return None
+        try:
+            kid, payload, signature = token.split(".")
+        except ValueError:
+            return None
+        if kid not in self.keys or not hmac.compare_digest(signature, self._sign(kid, payload)):
+            return None
+        try:
+            user_id, role, issued_at, expires_at, jti = _b64decode(payload).decode().split("|")
+            return int(user_id), role, int(issued_at), int(expires_at), jti
+        except ValueError:
+            return None
+
+    def verify(self, token):
+        """Return a SessionRecord for a valid, unexpired, unrevoked token, else None."""
+        claims = self._decode(token)
+        if claims is None:
+            return None
+        user_id, role, issued_at_ms, expires_at, jti = claims
+        if expires_at <= self._clock() or self.revocations.is_revoked(jti, user_id, issued_at_ms / 1000):
+            return None
+        return SessionRecord(user_id, role, issued_at_ms / 1000)
+
+    def revoke(self, token):
+        claims = self._decode(token)
+        if claims is not None:
+            self.revocations.revoke_token(claims[4], claims[3])
+
+    def revoke_user(self, user_id):
+        self.revocations.revoke_user(user_id, self._clock() + self.ttl)
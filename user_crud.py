@@ -1,98 +1,128 @@
-import sqlite3
-from security import hash_password, verify_password
+from security import hash_password, verify_password, needs_rehash
+import json
 from datetime import datetime
+from db_pool import get_connection, transaction
+from cache import cached_by_id, invalidate_id, invalidate_ids, user_cache
+from queries import projection, build_update
 
+# Columns a caller may read (never the password hash); get_user_by_id returns these.
+USER_FIELDS = ("id", "first_name", "last_name", "email", "role")
+# Columns update_user may set (password takes an already hashed value).
+USER_UPDATE_FIELDS = ("first_name", "last_name", "email", "password", "phone", "dob", "gender", "address", "role")
 
-def create_user(first_name, last_name, email, plain_password, phone, dob, gender, address,role):
-    connection_obj = sqlite3.connect("ams.db")
-    cursor_obj = connection_obj.cursor()
-    hashed_pw = hash_password(plain_password)
+
+def create_user(first_name, last_name, email, plain_password, phone, dob, gender, address,role, password_hash=None):
+    # password_hash: an already computed hash_password() value, used instead
+    # of hashing plain_password (lets callers hash outside a transaction).
+    hashed_pw = password_hash or hash_password(plain_password)
     current_datetime = datetime.now()
     now = current_datetime.isoformat()
 
-    cursor_obj.execute("""
-    INSERT INTO user (first_name, last_name, email, password, phone, dob, gender, address, role, created_at, updated_at)
-    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, (first_name, last_name, email, hashed_pw, phone, dob, gender, address, role, now, now)
-    )
-    connection_obj.commit()
-    user_id = cursor_obj.lastrowid
-    connection_obj.close()
+    with transaction() as connection_obj:
+        cursor_obj = connection_obj.cursor()
+        cursor_obj.execute("""
+        INSERT INTO user (first_name, last_name, email, password, phone, dob, gender, address, role, created_at, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (first_name, last_name, email, hashed_pw, phone, dob, gender, address, role, now, now)
+        )
+        user_id = cursor_obj.lastrowid
+        invalidate_id(user_cache, user_id)
     return user_id
 
 def update_user(user_id, **kwargs):
     """
     Update fields in the user record. For example:
       update_user(3, first_name="NewName", last_name="NewLast")
+    Only USER_UPDATE_FIELDS may be set (ValueError otherwise).
+    Returns the number of rows updated (0 when no user has that id).
     """
-    connection_obj = sqlite3.connect("ams.db")
-    cursor_obj = connection_obj.cursor()
-    set_clauses = []
-    values = []
-    for field, value in kwargs.items():
-        set_clauses.append(f"{field} = ?")
-        values.append(value)
-    if not set_clauses:
-        connection_obj.close()
-        return
-    set_clauses.append("updated_at = ?")
-    values.append(datetime.now())
-    set_str = ", ".join(set_clauses)
-    sql = f"UPDATE user SET {set_str} WHERE id = ?"
-    values.append(user_id)
-    try:
-        cursor_obj.execute(sql, (values))
-        connection_obj.commit()
-    finally:
-        connection_obj.close()
+    if not kwargs:
+        return 0
+    sql, values = build_update("user", USER_UPDATE_FIELDS, kwargs)
+    values += [datetime.now(), user_id]
+    with transaction() as connection_obj:
+        cursor_obj = connection_obj.execute(sql, values)
+        invalidate_id(user_cache, user_id)
+    return cursor_obj.rowcount
+
+def update_many_users(ids, **kwargs):
+    """
+    Set the same fields on every user in `ids` with one UPDATE statement,
+    e.g. update_many_users([4, 5, 6], first_name="NewName", last_name="NewLast")
+    Returns the number of rows updated.
+    """
+    ids = [int(row_id) for row_id in ids]
+    if not kwargs or not ids:
+        return 0
+    sql, values = build_update("user", USER_UPDATE_FIELDS, kwargs, many=True)
+    values += [datetime.now(), json.dumps(ids)]
+    with transaction() as connection_obj:
+        cursor_obj = connection_obj.execute(sql, values)
+        invalidate_ids(user_cache, ids)
+    return cursor_obj.rowcount
 
 def delete_user(user_id):
-    connection_obj = sqlite3.connect("ams.db")
-    cursor_obj = connection_obj.cursor()
-    try:
-        cursor_obj.execute("DELETE FROM user WHERE id = ?", (user_id,))
-        connection_obj.commit()
-    finally:
-        connection_obj.close()
+    with transaction() as connection_obj:
+        cursor_obj = connection_obj.execute("DELETE FROM user WHERE id = ?", (user_id,))
+        invalidate_id(user_cache, user_id)
+    return cursor_obj.rowcount
 
-def list_users_paginated(page=1, limit=10):
+def list_users_paginated(after=None, before=None, limit=10, fields=None):
     """
-    Return a paginated list of users.
-    page: 1-based page index
+    Return one page of users ordered by id, using the id as a cursor.
+    after: return the users that come after this id (next page)
+    before: return the users that come before this id (previous page)
     limit: how many records per page
+    fields: tuple of USER_FIELDS to select (id always first); default all
     """
-    offset = (page - 1) * limit
-    connection_obj = sqlite3.connect('ams.db')
+    _, columns = projection(fields or USER_FIELDS, USER_FIELDS)
+    connection_obj = get_connection()
     cursor_obj = connection_obj.cursor()
-    cursor_obj.execute("""
-        SELECT id, first_name, last_name, email, role
-        FROM user
-        ORDER BY id ASC
-        LIMIT ? OFFSET ?
-    """, (limit, offset))
-    rows = cursor_obj.fetchall()
-    connection_obj.close()
+    if before is not None:
+        cursor_obj.execute(f"""
+            SELECT {columns}
+            FROM user
+            WHERE id < ?
+            ORDER BY id DESC
+            LIMIT ?
+        """, (before, limit))
+        rows = cursor_obj.fetchall()
+        rows.reverse()
+    else:
+        cursor_obj.execute(f"""
+            SELECT {columns}
+            FROM user
+            WHERE id > ?
+            ORDER BY id ASC
+            LIMIT ?
+        """, (after or 0, limit))
+        rows = cursor_obj.fetchall()
     return rows
 
 
 def login(email, plain_password):
-    connection_obj = sqlite3.connect("ams.db")
+    connection_obj = get_connection()
     cursor_obj = connection_obj.cursor()
     cursor_obj.execute("SELECT id, email, password, role FROM user WHERE email = ?", (email,))
     row = cursor_obj.fetchone()
-    connection_obj.close()
     if not row:
         return None
     user_id, user_email, stored_hash, user_role = row
     if verify_password(stored_hash, plain_password):
+        if needs_rehash(stored_hash):
+            # Upgrade the stored hash to the current parameters while we
+            # have the plaintext; hash before opening the write transaction.
+            new_hash = hash_password(plain_password)
+            with transaction() as connection_obj:
+                connection_obj.execute("UPDATE user SET password = ? WHERE id = ?", (new_hash, user_id))
         return {"id": user_id, "email": user_email, "role": user_role}
     else:
-        return None                                                                                                                                                                                                  
+        return None
 
+@cached_by_id(user_cache)
 def get_user_by_id(user_id):
-    connection_obj = sqlite3.connect("ams.db")
+    connection_obj = get_connection()
     cursor_obj = connection_obj.cursor()
     cursor_obj.execute("SELECT id, first_name, last_name, email, role FROM user WHERE id = ?", (user_id,))
     row = cursor_obj.fetchone()
-    connection_obj.close()
     return row